@@ -0,0 +1,29 @@
+"""Hilfsmodule zur Fahrzeugdatenanalyse mit Daten von Autoscout24.
+
+Die Teilsysteme werden erst beim ersten Zugriff importiert, sodass z.B. ein
+reines Crawl-Skript weder plotly noch statsmodels oder sqlalchemy lädt::
+
+    import autoscout24
+    AutoDFraw = autoscout24.crawl.crawlAutoDFraw([2020], pages=1)
+
+Die Importzeiten der Teilsysteme misst ``python -m autoscout24.importbench``.
+"""
+
+import importlib
+
+# Teilsysteme, die erst beim ersten Zugriff importiert werden
+SUBSYSTEMS = ("crawl", "clean", "compact", "aggregate", "storage", "snapshot", "viz", "geo", "model", "pipeline",
+              "scheduler", "cli", "metrics", "benchmark", "synthetic", "enrich", "history", "normalize", "query",
+              "dashboard", "validate", "dedup", "crawlqueue")
+
+
+def __getattr__(name):
+    if name in SUBSYSTEMS:
+        module = importlib.import_module("." + name, __name__)
+        globals()[name] = module
+        return module
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+def __dir__():
+    return sorted(list(globals()) + list(SUBSYSTEMS))
@@ -0,0 +1,33 @@
+"""Gruppierungen des bereinigten AutoDF für die deskriptive Statistik."""
+
+
+def medianByMarke(AutoDF, col='Preis'):
+    """Median von *col* je Marke, aufsteigend sortiert (Reihenfolge der Boxplots)."""
+    return AutoDF.groupby(['Marke'], observed=True)[col].median().sort_values()
+
+
+def meanPreisByKraftstoff(AutoDF):
+    return AutoDF.groupby(by="Kraftstoff", observed=True)["Preis"].mean()
+
+
+def meanByMarke(AutoDF):
+    return AutoDF.groupby(by="Marke", observed=True).mean(numeric_only=True)
+
+
+def correlation(AutoDF):
+    return AutoDF.corr(numeric_only=True)
+
+
+# Name im Notebook -> Gruppierung
+AGGREGATES = {
+    "sorted_nb": lambda AutoDF: medianByMarke(AutoDF, 'Preis'),
+    "sorted_ps": lambda AutoDF: medianByMarke(AutoDF, 'PS'),
+    "PriceAveragePerKraftstoff": meanPreisByKraftstoff,
+    "MarkenGruppiert": meanByMarke,
+    "corr": correlation,
+}
+
+
+def aggregateAutoDF(AutoDF):
+    """Alle im Notebook verwendeten Gruppierungen in einem Dictionary."""
+    return {name: func(AutoDF) for name, func in AGGREGATES.items()}
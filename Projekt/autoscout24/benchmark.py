@@ -0,0 +1,173 @@
+"""Performance-Benchmarks auf Basis der HTML-Fixtures in Projekt/fixtures.
+
+Die Fixtures sind Autoscout24 Suchergebnisseiten mit normalen Inseraten,
+Leasing-Anzeigen (mit zusätzlicher VehicleDetailTable aus 3 Einträgen),
+fehlenden Untertiteln und Elektroautos. Gemessen werden Parsing
+(*parsePageCarDF*), Bereinigung, ein Storage-Roundtrip (sqlite), die
+Gruppierungen und der Modell-Fit, jeweils für mehrere Skalierungsfaktoren
+(Korpus * Faktor). Je Benchmark werden Durchsatz (Zeilen/s, Median aus
+*repeat* Läufen) und Speicherspitze (tracemalloc) erfasst. Der Korpus hat nur
+wenige Inserate; kleinere Faktoren als 10 messen daher vor allem Rauschen.
+Ohne statsmodels wird der Modell-Fit als übersprungen gemeldet.
+
+    python -m autoscout24.benchmark --scales 10 100 --save-baseline
+    python -m autoscout24.benchmark --threshold 0.25
+
+Mit gespeicherter Baseline endet der Lauf mit Exit Code 1, wenn ein Benchmark
+mehr als *threshold* an Durchsatz verliert oder an Speicher zulegt.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+from . import aggregate, clean, crawl
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures")
+DEFAULT_BASELINE = os.path.join(FIXTURE_DIR, "benchmark_baseline.json")
+DEFAULT_SCALES = (10, 100)
+DEFAULT_REPEAT = 5
+
+
+def loadCorpus(fixtureDir=FIXTURE_DIR):
+    """HTML aller Fixture-Seiten (page_*.html), sortiert nach Dateiname."""
+    pages = []
+    for name in sorted(os.listdir(fixtureDir)):
+        if name.startswith("page_") and name.endswith(".html"):
+            with open(os.path.join(fixtureDir, name), encoding="utf-8") as f:
+                pages.append(f.read())
+    return pages
+
+
+def _parse(pages):
+    return pd.concat([crawl.parsePageCarDF(html) for html in pages], axis=0, ignore_index=True)
+
+
+def _storageRoundtrip(AutoDF):
+    conn = sqlite3.connect(":memory:")
+    try:
+        AutoDF.to_sql("autoscout24cars-cleaned", conn, index=True, index_label="index")
+        return pd.read_sql_query('SELECT * FROM "autoscout24cars-cleaned"', conn, index_col="index")
+    finally:
+        conn.close()
+
+
+def _fitModel(AutoDF):
+    from . import model
+    return model.fitPriceModel(AutoDF)
+
+
+def _measure(func, arg, repeat):
+    """Median der Laufzeit aus *repeat* Läufen und Speicherspitze eines weiteren Laufs."""
+    seconds = []
+    for _ in range(max(repeat, 1)):
+        start = time.perf_counter()
+        func(arg)
+        seconds.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        func(arg)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return statistics.median(seconds), peak
+
+
+def runBenchmarks(scales=DEFAULT_SCALES, repeat=DEFAULT_REPEAT, fixtureDir=FIXTURE_DIR):
+    """Gibt {"<benchmark>@<scale>": {"rows", "seconds", "rows_per_second", "peak_bytes"}} zurück.
+
+    Nicht ausführbare Benchmarks erscheinen als {"skipped": Grund}.
+    """
+    corpus = loadCorpus(fixtureDir)
+    if not corpus:
+        raise FileNotFoundError("keine Fixtures (page_*.html) in %s" % fixtureDir)
+    rawCorpus = _parse(corpus)
+
+    try:
+        import statsmodels  # noqa: F401
+        withModel = True
+    except ImportError:
+        withModel = False
+
+    results = {}
+    for scale in scales:
+        pages = corpus * scale
+        AutoDFraw = pd.concat([rawCorpus] * scale, axis=0, ignore_index=True)
+        AutoDF = clean.cleanAutoDF(AutoDFraw)
+        benchmarks = [
+            ("parse", _parse, pages, len(AutoDFraw)),
+            ("clean", clean.cleanAutoDF, AutoDFraw, len(AutoDFraw)),
+            ("storage", _storageRoundtrip, AutoDF, len(AutoDF)),
+            ("aggregate", aggregate.aggregateAutoDF, AutoDF, len(AutoDF)),
+        ]
+        if withModel:
+            benchmarks.append(("model", _fitModel, AutoDF, len(AutoDF)))
+        for name, func, arg, rows in benchmarks:
+            seconds, peak = _measure(func, arg, repeat)
+            results["%s@%d" % (name, scale)] = {"rows": rows, "seconds": seconds,
+                                                "rows_per_second": rows / seconds if seconds else float("inf"),
+                                                "peak_bytes": peak}
+        if not withModel:
+            results["model@%d" % scale] = {"skipped": "statsmodels nicht installiert"}
+    return results
+
+
+def compareBaseline(results, baseline, threshold=0.2):
+    """Liste der Regressionen gegenüber der Baseline (Durchsatz oder Speicher)."""
+    regressions = []
+    for key, current in results.items():
+        base = baseline.get(key)
+        if base is None or "skipped" in current or "skipped" in base:
+            continue
+        if current["rows_per_second"] < base["rows_per_second"] * (1 - threshold):
+            regressions.append("%s: Durchsatz %.0f statt %.0f Zeilen/s"
+                               % (key, current["rows_per_second"], base["rows_per_second"]))
+        if current["peak_bytes"] > base["peak_bytes"] * (1 + threshold):
+            regressions.append("%s: Speicherspitze %.1f statt %.1f MB"
+                               % (key, current["peak_bytes"] / 1024 ** 2, base["peak_bytes"] / 1024 ** 2))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Autoscout24 Performance-Benchmarks")
+    parser.add_argument("--scales", type=int, nargs="+", default=list(DEFAULT_SCALES))
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Läufe je Benchmark (Median)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Ergebnis als neue Baseline speichern")
+    parser.add_argument("--threshold", type=float, default=0.2, help="erlaubte Verschlechterung (0.2 = 20 %%)")
+    parser.add_argument("--json", action="store_true", help="Ergebnis als JSON ausgeben")
+    args = parser.parse_args(argv)
+
+    results = runBenchmarks(args.scales, args.repeat)
+
+    regressions = []
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compareBaseline(results, json.load(f), args.threshold)
+
+    if args.json:
+        print(json.dumps({"results": results, "regressions": regressions}, indent=2))
+    else:
+        for key, r in results.items():
+            if "skipped" in r:
+                print("%-16s übersprungen (%s)" % (key, r["skipped"]))
+                continue
+            print("%-16s %8d Zeilen %10.4f s %12.0f Zeilen/s %8.2f MB"
+                  % (key, r["rows"], r["seconds"], r["rows_per_second"], r["peak_bytes"] / 1024 ** 2))
+        for regression in regressions:
+            print("REGRESSION " + regression)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
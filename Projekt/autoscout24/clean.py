@@ -0,0 +1,107 @@
+"""Aufbereitung und Bereinigung der gecrawlten Rohdaten (AutoDFraw -> AutoDF)."""
+
+import numpy as np
+import pandas as pd
+
+from .normalize import splitMarke
+from .validate import validateAutoDF
+
+# Ausstattungsmerkmale, die im Untertitel gesucht werden
+AUSSTATTUNG = {
+    "Alufelgen": ["Alufelgen"],
+    "Sitzheizung": ["Sitzheizung"],
+    "Klimaanlage": ["Klimaanlage", "Klimaautomatik"],
+    "Einparkhilfe": ["Einparkhilfe "],
+    "Navigationssystem": ["Navigationssystem"],
+}
+
+# vollständig leere oder fehlende Angaben ("", "-")
+_MISSING = r"^\s*-?\s*$"
+
+
+def transformRaw(AutoDFraw):
+    """Raw Data Transformation: Sonderzeichen und Einheiten entfernen, Spalten ableiten."""
+    AutoDF = AutoDFraw.copy()
+
+    #Marke ist das erste Wort des Titels, außer bei Marken wie "Land Rover"
+    AutoDF['Marke'] = splitMarke(AutoDF['Titel'])
+
+    #alles hinter dem ersten Kaufpreis (z.B. Leasingpreis) entfernen, dann alle nicht numerischen Zeichen
+    AutoDF['Preis'] = AutoDF['Preis'].replace('(,-).*', '', regex=True)
+    AutoDF['Preis'] = AutoDF['Preis'].str.replace(r'[^0-9]+', '', regex=True)
+
+    AutoDF['km'] = AutoDF['km'].replace(r'[^0-9]+', '', regex=True)
+    AutoDF['Fahrzeughalter'] = AutoDF['Fahrzeughalter'].replace(r'[^0-9]+', '', regex=True)
+    AutoDF['Verbrauch_l_pro_100km'] = AutoDF['Verbrauch_l_pro_100km'].replace([r'\(l/100 km\)', 'l/100 km', r'\(komb.\)'], '', regex=True)
+    AutoDF['Emissionen_g_pro_km'] = AutoDF['Emissionen_g_pro_km'].replace(r'[^0-9]+', '', regex=True)
+
+    #Monat der Erstzulassung entfernen
+    AutoDF['Erstzulassung'] = AutoDF['Erstzulassung'].replace('.*/', '', regex=True)
+    AutoDF['Erstzulassung'] = AutoDF['Erstzulassung'].replace(r'[^0-9]+', '', regex=True)
+
+    #erst den Wert in kW entfernen, dann alle nicht numerischen Zeichen
+    AutoDF['PS'] = AutoDF['PS'].replace(['.*kW', r'\(', r'PS\)'], '', regex=True)
+    AutoDF['PS'] = AutoDF['PS'].replace(r'[^0-9]+', '', regex=True)
+
+    #fehlende Werte durch NULL ersetzen; Verbrauch 0 bei Elektroautos regelt validate.RULES
+    for col in ['Verbrauch_l_pro_100km', 'Emissionen_g_pro_km', 'Fahrzeughalter', 'Erstzulassung', 'km', 'PS']:
+        AutoDF[col] = AutoDF[col].replace(_MISSING, np.nan, regex=True)
+
+    AutoDF['Verbrauch_l_pro_100km'] = AutoDF['Verbrauch_l_pro_100km'].replace(',', '.', regex=True)
+
+    #Stadtname ist das letzte Wort des Standorts
+    AutoDF['Stadt'] = AutoDF['Standort'].str.split(' ').str[-1]
+    AutoDF = AutoDF.drop('Standort', axis=1)
+
+    #Ausstattung vorhanden, wenn sie im Untertitel erwähnt wird
+    for merkmal, suchbegriffe in AUSSTATTUNG.items():
+        vorhanden = pd.Series(False, index=AutoDF.index)
+        for begriff in suchbegriffe:
+            vorhanden |= AutoDF['Untertitel'].str.contains(begriff, regex=False).fillna(False).astype(bool)
+        AutoDF[merkmal] = vorhanden
+
+    AutoDF['Leasing'] = AutoDF['Leasing'].astype(bool)
+    return AutoDF
+
+
+CATEGORY_COLUMNS = ['Getriebe', 'Kraftstoff', 'Marke']
+
+
+def _castAutoDF(AutoDF):
+    """Datentypen der geprüften Zeilen setzen."""
+    AutoDF = AutoDF.drop(columns=['Zustand', 'Leasing', 'Fahrzeughalter'])
+    AutoDF = AutoDF.astype({'Preis': 'int', 'km': 'int', 'PS': 'int', 'Emissionen_g_pro_km': 'int',
+                            'Erstzulassung': 'float', 'Verbrauch_l_pro_100km': 'float'})
+    for col in CATEGORY_COLUMNS:
+        AutoDF[col] = AutoDF[col].astype('category')
+    return AutoDF
+
+
+def filterAutoDF(AutoDF):
+    """Bereinigung: Zeilen, die eine Prüfregel verletzen (siehe validate.RULES), entfernen, Datentypen setzen."""
+    AutoDF, _, _ = validateAutoDF(AutoDF)
+    return _castAutoDF(AutoDF)
+
+
+def concatPartitions(AutoDFs):
+    """Fügt einzeln bereinigte Partitionen wieder zu einem AutoDF zusammen.
+
+    Die Kategorien der Partitionen unterscheiden sich, daher werden die
+    categorical Spalten nach dem concat neu gesetzt. Der Index bleibt erhalten;
+    die Partitionen sollten daher Ausschnitte eines gemeinsamen AutoDFraw sein.
+    """
+    AutoDF = pd.concat(AutoDFs, axis=0)
+    for col in CATEGORY_COLUMNS:
+        AutoDF[col] = AutoDF[col].astype(object).astype('category')
+    return AutoDF
+
+
+def cleanAutoDF(AutoDFraw):
+    """Komplette Aufbereitung von AutoDFraw zum bereinigten AutoDF."""
+    return filterAutoDF(transformRaw(AutoDFraw))
+
+
+def cleanPartition(AutoDFraw):
+    """Wie cleanAutoDF, gibt zusätzlich die Quarantäne (Rohdaten) und die Treffer je Prüfregel zurück."""
+    AutoDF, quarantine, hits = validateAutoDF(transformRaw(AutoDFraw), raw=AutoDFraw)
+    return _castAutoDF(AutoDF), quarantine, hits
@@ -0,0 +1,190 @@
+"""Headless Ausführung der Pipeline crawl -> clean -> store -> aggregate.
+
+    python -m autoscout24 --years 2015-2020 --pages 20 --workers 8 --sink pickle:daten
+
+Unabhängige Jobs einer Stage (Crawl je Erstzulassungsjahr, Bereinigung je
+Jahrespartition, Gruppierungen, Schreiben der Tabellen) laufen parallel über
+*scheduler.runStage*. Am Ende werden die Laufstatistiken als JSON auf stdout
+ausgegeben. Exit Code: 0 = ok, 1 = einzelne Jobs fehlgeschlagen, 2 = Abbruch.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+from . import aggregate, clean, crawl, storage
+from .metrics import METRICS
+from .scheduler import runStage
+
+EXIT_OK, EXIT_PARTIAL, EXIT_FAILED = 0, 1, 2
+
+
+def parseYears(value):
+    """'2015-2020', '2015,2018' oder '2020' -> Liste von Jahren."""
+    years = []
+    for part in value.split(","):
+        if "-" in part:
+            start, end = part.split("-")
+            years.extend(range(int(start), int(end) + 1))
+        else:
+            years.append(int(part))
+    return years
+
+
+def crawlYear(freg, pages):
+    """Crawlt alle Seiten eines Jahres. Fehlerhafte Seiten werden übersprungen und gezählt."""
+    pageCarDFs, failedPages = [], []
+    for page in range(pages):
+        try:
+            pageCarDFs.append(crawl.extractPageCarDF(crawl.buildURL(freg, page)))
+        except Exception as e:
+            failedPages.append({"page": page, "error": "%s: %s" % (type(e).__name__, e)})
+    if not pageCarDFs:
+        return pd.DataFrame(), failedPages
+    with METRICS.timer("concat_seconds"):
+        AutoDFyear = pd.concat(pageCarDFs, axis=0, ignore_index=True)
+    return AutoDFyear, failedPages
+
+
+def writeSink(sink, tables, workers, config):
+    """Schreibt die Tabellen parallel in die Senke (none, postgres, pickle:DIR, parquet:DIR)."""
+    kind, _, target = sink.partition(":")
+    if kind == "none":
+        return None
+    if kind == "postgres":
+        engine = storage.createEngine(storage.loadConfig(config))
+        return runStage("store", lambda name: storage.writeTable(tables[name], name, engine), list(tables), workers)
+    if kind in ("pickle", "parquet"):
+        os.makedirs(target or ".", exist_ok=True)
+
+        def write(name):
+            path = os.path.join(target or ".", "%s.%s" % (name, "pkl" if kind == "pickle" else "parquet"))
+            getattr(tables[name], "to_" + kind)(path)
+            return path
+        return runStage("store", write, list(tables), workers)
+    raise ValueError("unbekannte Senke %r" % sink)
+
+
+def runPipeline(years, pages, workers, sink="none", config="configLocalDS.json", cleanProcesses=False,
+                enrichWorkers=0, dedup=False, queue=None, checkpointDir=None):
+    """Führt die Pipeline aus und gibt (Exit Code, Statistik-Dictionary) zurück.
+
+    Mit *queue* wird über die persistente Warteschlange gecrawlt (siehe
+    crawlqueue); ein abgebrochener Lauf setzt dann beim letzten Checkpoint fort.
+    """
+    start = time.perf_counter()
+    stats = {"years": years, "pages": pages, "workers": workers, "sink": sink, "stages": {}}
+
+    if queue:
+        from . import crawlqueue
+        checkpointDir = checkpointDir or crawlqueue.DEFAULT_CHECKPOINT_DIR
+        crawlQueue = crawlqueue.CrawlQueue(queue)
+        crawlQueue.enqueue(years, pages)
+        crawled = runStage("crawl", lambda i: crawlqueue.drainQueue(crawlQueue, checkpointDir, worker="worker-%d" % i),
+                           list(range(workers)), workers)
+        stats["stages"]["crawl"] = crawled.stats()
+        stats["stages"]["crawl"]["queue"] = crawlQueue.progress()
+        #jeder nicht erledigte Auftrag der angefragten Jahre fehlt in den Daten
+        failedPages = {}
+        for freg, _, page, status, error in crawlQueue.unfinishedJobs():
+            if freg in years:
+                failedPages.setdefault(str(freg), []).append({"page": page, "status": status, "error": error})
+        partitions = crawlqueue.loadCheckpoints(checkpointDir, years)
+    else:
+        crawled = runStage("crawl", lambda freg: crawlYear(freg, pages), years, workers)
+        stats["stages"]["crawl"] = crawled.stats()
+        failedPages = {str(freg): failed for freg, (_, failed) in sorted(crawled.results.items()) if failed}
+        partitions = {freg: df for freg, (df, _) in sorted(crawled.results.items()) if not df.empty}
+    stats["stages"]["crawl"]["failed_pages"] = failedPages
+    if not partitions:
+        stats.update(status="failed", seconds=round(time.perf_counter() - start, 3))
+        return EXIT_FAILED, stats
+    with METRICS.timer("concat_seconds"):
+        AutoDFraw = pd.concat(partitions.values(), axis=0, ignore_index=True)
+    #Partitionen als Ausschnitte von AutoDFraw, damit der Index in Roh-, bereinigter
+    #und Quarantäne-Tabelle dieselbe Zeile bezeichnet
+    bounds = list(itertools.accumulate([len(df) for df in partitions.values()], initial=0))
+    partitions = {freg: AutoDFraw.iloc[start:end] for freg, start, end in zip(partitions, bounds, bounds[1:])}
+
+    #Bereinigung je Jahrespartition
+    cleaned = runStage("clean", clean.cleanPartition, partitions, workers, processes=cleanProcesses)
+    stats["stages"]["clean"] = cleaned.stats()
+    results = [cleaned.results[freg] for freg in sorted(cleaned.results)]
+    with METRICS.timer("concat_seconds"):
+        AutoDF = clean.concatPartitions([AutoDFyear for AutoDFyear, _, _ in results])
+        #Zeilen, die eine Prüfregel verletzen, werden mit Begründung separat gespeichert
+        quarantine = pd.concat([q for _, q, _ in results], axis=0)
+    stats["stages"]["clean"]["rule_hits"] = {rule: int(count) for rule, count in
+                                             pd.concat([hits for _, _, hits in results], axis=1).sum(axis=1).items()}
+
+    duplicates = 0
+    if dedup:
+        #mehrfach eingestellte Inserate verfälschen Anzahlen und Boxplots je Marke
+        from . import dedup as dedupModule
+        dedupStart = time.perf_counter()
+        AutoDF, duplicateDF = dedupModule.dropDuplicateListings(AutoDF)
+        duplicates = len(duplicateDF)
+        stats["stages"]["dedup"] = {"seconds": round(time.perf_counter() - dedupStart, 3), "duplicates": duplicates}
+
+    if enrichWorkers:
+        #Detailseiten mit eigenem Worker-Budget
+        from . import enrich
+        enrichStart = time.perf_counter()
+        AutoDF = enrich.enrichAutoDF(AutoDF, workers=enrichWorkers)
+        stats["stages"]["enrich"] = {"seconds": round(time.perf_counter() - enrichStart, 3)}
+
+    stored = writeSink(sink, {storage.RAW_TABLE: AutoDFraw, storage.CLEANED_TABLE: AutoDF,
+                              storage.QUARANTINE_TABLE: quarantine}, workers, config)
+    if stored is not None:
+        stats["stages"]["store"] = stored.stats()
+
+    aggregated = runStage("aggregate", lambda name: aggregate.AGGREGATES[name](AutoDF), list(aggregate.AGGREGATES), workers)
+    stats["stages"]["aggregate"] = aggregated.stats()
+
+    stats["rows"] = {"raw": len(AutoDFraw), "clean": len(AutoDF), "quarantine": len(quarantine), "duplicates": duplicates}
+    failed = failedPages or any(stage.get("failed") for stage in stats["stages"].values())
+    stats["status"] = "partial" if failed else "ok"
+    stats["seconds"] = round(time.perf_counter() - start, 3)
+    return (EXIT_PARTIAL if failed else EXIT_OK), stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Autoscout24 crawl -> clean -> store -> aggregate")
+    parser.add_argument("--years", type=parseYears, default=parseYears("1990-2021"),
+                        help="Erstzulassungsjahre, z.B. 2015-2020 oder 2015,2018")
+    parser.add_argument("--pages", type=int, default=20, help="Suchergebnisseiten je Jahr (max. 20)")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--sink", default="none", help="none, postgres, pickle:DIR oder parquet:DIR")
+    parser.add_argument("--config", default="configLocalDS.json", help="Datenbank-Parameter für --sink postgres")
+    parser.add_argument("--clean-processes", action="store_true",
+                        help="Bereinigung in einem Prozesspool (Treffer je Regel nur in rule_hits)")
+    parser.add_argument("--enrich-workers", type=int, default=0,
+                        help="Detailseiten mit N Workern anreichern (0 = aus)")
+    parser.add_argument("--dedup", action="store_true", help="mehrfach eingestellte Inserate entfernen")
+    parser.add_argument("--queue", help="fortsetzbar über eine SQLite Warteschlange crawlen, z.B. crawl_queue.sqlite")
+    parser.add_argument("--checkpoint-dir", help="Verzeichnis der gecrawlten Batches bei --queue")
+    parser.add_argument("--metrics", help="Metriken zusätzlich in Datei schreiben (.prom = Prometheus, sonst JSON)")
+    args = parser.parse_args(argv)
+
+    METRICS.reset()
+    try:
+        code, stats = runPipeline(args.years, args.pages, args.workers, args.sink, args.config, args.clean_processes,
+                                  args.enrich_workers, args.dedup, args.queue, args.checkpoint_dir)
+    except Exception as e:
+        code, stats = EXIT_FAILED, {"status": "failed", "error": "%s: %s" % (type(e).__name__, e)}
+    stats["metrics"] = METRICS.toDict()
+    if args.metrics:
+        with open(args.metrics, "w") as f:
+            f.write(METRICS.toPrometheus() if args.metrics.endswith(".prom") else METRICS.toJSON(indent=2))
+    json.dump(stats, sys.stdout, indent=2, default=str)
+    print()
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""Kompakte Speicherdarstellung des bereinigten AutoDF.
+
+Nach der Bereinigung liegen Texte als Python-Objekte, Zahlen als int64/float64
+und die Ausstattungsmerkmale als object vor. *compactAutoDF* wandelt die Spalten
+in möglichst kleine Datentypen um:
+
+* numerische Spalten werden auf passende unsigned/float32 Typen reduziert
+* Spalten mit vielen Wiederholungen (Titel, Version, Stadt, ...) werden als
+  category (Dictionary-Encoding) gespeichert
+* lange Freitexte und Schlüssel (Untertitel, ID, Link) werden als Arrow-Strings abgelegt
+"""
+
+import numpy as np
+import pandas as pd
+
+# Zieltypen der numerischen Spalten. Ist eine Spalte nicht vollständig gefüllt,
+# wird der entsprechende nullable Typ (z.B. UInt16) verwendet.
+NUMERIC_DTYPES = {
+    "Preis": "uint32",
+    "km": "uint32",
+    "PS": "uint16",
+    "Erstzulassung": "uint16",
+    "Emissionen_g_pro_km": "uint16",
+    "Verbrauch_l_pro_100km": "float32",
+}
+
+# Spalten, die nur wenige verschiedene Ausprägungen haben
+CATEGORY_COLUMNS = ["Marke", "Modell", "Ausstattungslinie", "Getriebe", "Kraftstoff", "Stadt", "Version", "Titel"]
+
+# Lange Freitexte, die kaum Wiederholungen enthalten
+TEXT_COLUMNS = ["ID", "Link", "Untertitel"]
+
+# Ausstattungsmerkmale aus dem Untertitel
+FLAG_COLUMNS = ["Alufelgen", "Sitzheizung", "Klimaanlage", "Einparkhilfe", "Navigationssystem"]
+
+
+def _stringDtype():
+    # Arrow-Strings nur, wenn pyarrow installiert ist
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return "string"
+    return "string[pyarrow]"
+
+
+def _downcast(series, dtype):
+    if series.isna().any():
+        if dtype.startswith("float"):
+            return series.astype(dtype)
+        # nullable Integer-Typ, z.B. uint16 -> UInt16
+        return series.astype(dtype[0].upper() + dtype[1:].replace("int", "Int"))
+    if dtype.startswith("uint") and (series < 0).any():
+        # negative Werte würden beim Cast überlaufen
+        return pd.to_numeric(series, downcast="integer")
+    info = np.iinfo(dtype) if dtype.startswith(("int", "uint")) else None
+    if info is not None and series.max() > info.max:
+        return pd.to_numeric(series, downcast="unsigned")
+    return series.astype(dtype)
+
+
+def memoryUsage(df):
+    """Gibt den Speicherbedarf je Spalte (in Bytes, inkl. Index) zurück."""
+    return df.memory_usage(index=True, deep=True)
+
+
+def memoryReport(before, after):
+    """Vergleicht den Speicherbedarf zweier Dataframes spaltenweise."""
+    report = pd.DataFrame({
+        "dtype_vorher": before.dtypes.astype(str),
+        "dtype_nachher": after.dtypes.astype(str),
+    })
+    report = report.reindex(memoryUsage(before).index)
+    report.loc["Index", ["dtype_vorher", "dtype_nachher"]] = str(before.index.dtype), str(after.index.dtype)
+    report["bytes_vorher"] = memoryUsage(before)
+    report["bytes_nachher"] = memoryUsage(after)
+    report.loc["Gesamt"] = ["", "", report["bytes_vorher"].sum(), report["bytes_nachher"].sum()]
+    report["Anteil"] = (report["bytes_nachher"] / report["bytes_vorher"]).round(3)
+    return report
+
+
+def compactAutoDF(AutoDF, verbose=False):
+    """Erzeugt eine speichersparende Kopie des bereinigten AutoDF.
+
+    Gibt das kompakte Dataframe und einen Speicherbericht (*memoryReport*) zurück.
+    Mit verbose=True wird der Speicherbedarf vorher/nachher ausgegeben.
+    """
+    compactDF = AutoDF.copy()
+
+    for col, dtype in NUMERIC_DTYPES.items():
+        if col in compactDF.columns:
+            compactDF[col] = _downcast(pd.to_numeric(compactDF[col]), dtype)
+
+    for col in CATEGORY_COLUMNS:
+        if col in compactDF.columns:
+            compactDF[col] = compactDF[col].astype("category")
+
+    stringDtype = _stringDtype()
+    for col in TEXT_COLUMNS:
+        if col in compactDF.columns:
+            compactDF[col] = compactDF[col].astype(stringDtype)
+
+    for col in FLAG_COLUMNS:
+        if col in compactDF.columns:
+            # fehlende Angaben bedeuten: Ausstattung nicht vorhanden
+            compactDF[col] = compactDF[col].fillna(False).astype("bool")
+
+    report = memoryReport(AutoDF, compactDF)
+    if verbose:
+        total = report.loc["Gesamt"]
+        print("Speicherbedarf vorher:  %.2f MB" % (total["bytes_vorher"] / 1024 ** 2))
+        print("Speicherbedarf nachher: %.2f MB (%.1f %%)" % (total["bytes_nachher"] / 1024 ** 2, total["Anteil"] * 100))
+
+    return compactDF, report
@@ -0,0 +1,144 @@
+"""Webcrawling der Autoscout24 Suchergebnisseiten."""
+
+from urllib.parse import urljoin
+
+import numpy as np
+import pandas as pd
+import requests
+from bs4 import BeautifulSoup
+
+from .metrics import METRICS
+
+BASELINK = "https://www.autoscout24.de/lst?fregfrom="
+HOST = "https://www.autoscout24.de"
+# Sekunden bis zum Abbruch einer Anfrage, damit ein hängender Server den Crawl nicht blockiert
+FETCH_TIMEOUT = 30
+
+# Spalten der VehicleDetailTable in der Reihenfolge der Webseite
+VEHICLE_DETAIL_COLUMNS = ["km", "Erstzulassung", "PS", "Zustand", "Fahrzeughalter", "Getriebe",
+                          "Kraftstoff", "Verbrauch_l_pro_100km", "Emissionen_g_pro_km"]
+
+
+def buildURL(freg, page, fregto=None):
+    """Link zu einer Suchergebnisseite mit Filter Erstzulassung von freg bis fregto (Standard: freg)."""
+    return BASELINK + str(freg) + "&fregto=" + str(freg if fregto is None else fregto) + "&page=" + str(page)
+
+
+def fetchPage(URL, timeout=FETCH_TIMEOUT):
+    """Lädt eine Seite; eine Zeitüberschreitung wird wie jeder andere Fehler ausgelöst."""
+    try:
+        with METRICS.timer("fetch_seconds"):
+            text = requests.get(URL, timeout=timeout).text
+    except Exception as e:
+        METRICS.inc("fetch_errors_total")
+        if isinstance(e, requests.Timeout):
+            METRICS.inc("fetch_timeouts_total")
+        raise
+    METRICS.inc("pages_fetched_total")
+    return text
+
+
+def _parseFailure(selector):
+    #nicht gefundene Elemente je Selektor zählen, um Änderungen am Markup zu erkennen
+    METRICS.inc("parse_failures_total", selector=selector)
+    return np.nan
+
+
+def parsePageCarDF(html):
+    """Extrahiert alle Fahrzeuge einer Suchergebnisseite in ein Dataframe."""
+    with METRICS.timer("parse_seconds"):
+        pageCarDF = _parsePageCarDF(html)
+    METRICS.inc("listings_parsed_total", len(pageCarDF))
+    return pageCarDF
+
+
+def _listingID(car):
+    """Stabiler Schlüssel eines Inserats: id des article Elements bzw. Link zum Inserat."""
+    for attr in ("id", "data-guid"):
+        if car.get(attr):
+            return car.get(attr)
+    link = car.find("a", href=True)
+    if link is not None:
+        return link["href"].rstrip("/").split("/")[-1]
+    return _parseFailure("article id")
+
+
+def _listingLink(car):
+    """Absoluter Link zur Detailseite des Inserats."""
+    link = car.find("a", href=True)
+    if link is None:
+        return _parseFailure("article link")
+    return urljoin(HOST, link["href"])
+
+
+def _vehicleDetails(car):
+    """VehicleDetailTable des Inserats; die zusätzliche Leasing-Tabelle (3 Einträge) wird übersprungen."""
+    for table in car.findAll("div", {"class": lambda L: L and L.startswith("VehicleDetailTable_container")}):
+        VehicleDetailList = [c.text for c in table]
+        if len(VehicleDetailList) >= len(VEHICLE_DETAIL_COLUMNS):
+            return dict(zip(VEHICLE_DETAIL_COLUMNS, VehicleDetailList))
+        METRICS.inc("detail_tables_skipped_total", length=len(VehicleDetailList))
+    _parseFailure("VehicleDetailTable")
+    return {}
+
+
+def _parsePageCarDF(html):
+    soup = BeautifulSoup(html, "html.parser")
+    pageCars = []
+
+    #alle Daten eines Fahrzeugs werden innerhalb seines article Elements gesucht,
+    #sodass fehlende oder zusätzliche Detailtabellen nicht auf andere Inserate verrutschen
+    for car in soup.findAll("article"):
+        data = car.find("div", {"class": lambda L: L and L.startswith("ListItem_wrapper")})
+        try:
+            header = data.find("h2").text
+        except Exception:
+            header = _parseFailure("h2")
+        try:
+            version = data.find("span", {"class": lambda L: L and L.startswith("ListItem_version")}).text
+        except Exception:
+            version = _parseFailure("ListItem_version")
+        try:
+            subtitle = data.find("span", {"class": lambda L: L and L.startswith("ListItem_subtitle")}).text
+        except Exception:
+            subtitle = _parseFailure("ListItem_subtitle")
+        try:
+            #Versuch Preis Element zu finden
+            price = data.find("div", {"class": lambda L: L and L.startswith("ListItem_pricerow")}).text
+            leasing = False
+        except Exception:
+            #wenn oberes Element nicht gefunden werden kann, handelt es sich um einen Leasing Wagen
+            try:
+                price = data.find("span", {"class": lambda L: L and L.startswith("LeasingPrice_price")}).text
+                leasing = True
+            except Exception:
+                price, leasing = _parseFailure("LeasingPrice_price"), False
+        try:
+            location = car.find("span", {"style": lambda L: L and L.startswith("grid-area:address")}).text
+        except Exception:
+            location = _parseFailure("grid-area:address")
+
+        carData = {"ID": _listingID(car), "Link": _listingLink(car), "Titel": header, "Version": version, "Untertitel": subtitle,
+                   "Preis": price, "Leasing": leasing, "Standort": location}
+        carData.update(_vehicleDetails(car))
+        pageCars.append(carData)
+
+    return pd.DataFrame(pageCars, columns=["ID", "Link", "Titel", "Version", "Untertitel", "Preis", "Leasing", "Standort"]
+                        + VEHICLE_DETAIL_COLUMNS)
+
+
+def extractPageCarDF(URL):
+    """Lädt eine Suchergebnisseite und gibt deren Fahrzeuge als Dataframe zurück."""
+    return parsePageCarDF(fetchPage(URL))
+
+
+def crawlAutoDFraw(fregList=range(1990, 2022), pages=20):
+    """Crawlt für jedes Jahr der Erstzulassung *pages* Suchergebnisseiten."""
+    pageCarDFs = []
+    for freg in fregList:
+        for page in range(pages):
+            pageCarDFs.append(extractPageCarDF(buildURL(freg, page)))
+    if not pageCarDFs:
+        return pd.DataFrame()
+    with METRICS.timer("concat_seconds"):
+        return pd.concat(pageCarDFs, axis=0, ignore_index=True)
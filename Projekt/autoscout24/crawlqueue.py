@@ -0,0 +1,306 @@
+"""Fortsetzbarer Crawl über eine persistente Warteschlange in SQLite.
+
+Jede Suchergebnisseite ist ein Auftrag (fregfrom, fregto, page) mit Status
+(pending, running, done, failed) und Anzahl der Versuche. Worker holen sich
+Aufträge in Batches, crawlen die Seiten und schreiben jeden fertigen Batch
+sofort als Datei je Erstzulassungsjahr in das Checkpoint-Verzeichnis
+(``freg=2015/part-<uuid>.parquet``), bevor die Aufträge als erledigt markiert
+werden. Bricht ein Lauf ab, setzt ein neuer Lauf mit denselben Dateien nach dem
+letzten Checkpoint fort. Mehrere Prozesse können dieselbe Warteschlange
+abarbeiten::
+
+    python -m autoscout24.crawlqueue --years 2015-2020 --pages 20 --processes 4
+
+Aufträge eines abgestürzten Workers werden nach LEASE_SECONDS erneut vergeben,
+nach MAX_ATTEMPTS Versuchen gelten sie als fehlgeschlagen. Startet ein Worker
+mit demselben Namen neu (das CLI verwendet worker-0, worker-1, ...), gibt er
+seine eigenen Aufträge sofort wieder frei. Solange Aufträge anderer Worker
+laufen, wartet ein Worker, bis sie erledigt sind oder ihre Reservierung abläuft. Ein fehlgeschlagener
+Versuch wird frühestens nach BACKOFF_SECONDS * 2^(Versuche - 1) wiederholt.
+Wurde ein Batch geschrieben, aber nicht mehr als erledigt markiert, wird er
+erneut gecrawlt; *loadCheckpoints* entfernt die doppelten Inserate über die ID.
+"""
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import sys
+import time
+import uuid
+
+import pandas as pd
+
+from . import crawl
+from .metrics import METRICS
+
+DEFAULT_QUEUE = "crawl_queue.sqlite"
+DEFAULT_CHECKPOINT_DIR = "crawl_checkpoints"
+BATCH_SIZE = 20
+MAX_ATTEMPTS = 3
+LEASE_SECONDS = 600
+BACKOFF_SECONDS = 30
+# längste Wartezeit, bevor ein Worker erneut nach fälligen Aufträgen fragt
+POLL_SECONDS = 5
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    fregfrom INTEGER NOT NULL,
+    fregto INTEGER NOT NULL,
+    page INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    error TEXT,
+    updated REAL,
+    notbefore REAL,
+    PRIMARY KEY (fregfrom, fregto, page)
+)
+"""
+
+
+class CrawlQueue:
+    """Persistente Warteschlange der zu crawlenden Suchergebnisseiten."""
+
+    def __init__(self, path=DEFAULT_QUEUE, maxAttempts=MAX_ATTEMPTS, leaseSeconds=LEASE_SECONDS,
+                 backoffSeconds=BACKOFF_SECONDS):
+        self.path = path
+        self.maxAttempts = maxAttempts
+        self.leaseSeconds = leaseSeconds
+        self.backoffSeconds = backoffSeconds
+        con = sqlite3.connect(self.path, timeout=30)
+        try:
+            con.execute("PRAGMA journal_mode = WAL")
+            con.execute(_SCHEMA)
+            #Warteschlangen älterer Versionen um die Spalte notbefore ergänzen
+            if "notbefore" not in [row[1] for row in con.execute("PRAGMA table_info(jobs)")]:
+                con.execute("ALTER TABLE jobs ADD COLUMN notbefore REAL")
+        finally:
+            con.close()
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        #eine Verbindung je Aufruf, damit Threads und Prozesse die Queue gemeinsam nutzen können;
+        #BEGIN IMMEDIATE sperrt die Datenbank für andere Schreiber bis zum COMMIT
+        con = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                yield con
+            except BaseException:
+                con.execute("ROLLBACK")
+                raise
+            con.execute("COMMIT")
+        finally:
+            con.close()
+
+    def enqueue(self, fregList, pages):
+        """Legt die Aufträge an; bereits vorhandene Aufträge bleiben unverändert."""
+        jobs = [(freg, freg, page) for freg in fregList for page in range(pages)]
+        with self._transaction() as con:
+            con.executemany("INSERT OR IGNORE INTO jobs (fregfrom, fregto, page) VALUES (?, ?, ?)", jobs)
+        return len(jobs)
+
+    def claim(self, n=BATCH_SIZE, worker=None):
+        """Reserviert bis zu *n* fällige Aufträge (auch abgelaufene Reservierungen anderer Worker)."""
+        now = time.time()
+        #Auswahl und Reservierung in einer Transaktion, sodass kein Auftrag doppelt vergeben wird
+        with self._transaction() as con:
+            #abgelaufene Reservierungen ohne verbleibende Versuche würden sonst für immer 'running' bleiben
+            con.execute("UPDATE jobs SET status = 'failed', error = coalesce(error, 'Reservierung abgelaufen'),"
+                        " updated = ? WHERE status = 'running' AND updated < ? AND attempts >= ?",
+                        (now, now - self.leaseSeconds, self.maxAttempts))
+            jobs = con.execute(
+                "SELECT fregfrom, fregto, page FROM jobs"
+                " WHERE (status = 'pending' OR (status = 'running' AND updated < ?)) AND attempts < ?"
+                " AND (notbefore IS NULL OR notbefore <= ?)"
+                " ORDER BY fregfrom, page LIMIT ?", (now - self.leaseSeconds, self.maxAttempts, now, n)).fetchall()
+            con.executemany("UPDATE jobs SET status = 'running', attempts = attempts + 1, worker = ?, updated = ?"
+                            " WHERE fregfrom = ? AND fregto = ? AND page = ?",
+                            [(worker, now) + job for job in jobs])
+        return jobs
+
+    def complete(self, jobs):
+        with self._transaction() as con:
+            con.executemany("UPDATE jobs SET status = 'done', error = NULL, updated = ?"
+                            " WHERE fregfrom = ? AND fregto = ? AND page = ?", [(time.time(),) + tuple(job) for job in jobs])
+
+    def fail(self, job, error):
+        """Gibt den Auftrag mit Backoff wieder frei bzw. markiert ihn nach maxAttempts Versuchen als fehlgeschlagen."""
+        now = time.time()
+        with self._transaction() as con:
+            con.execute("UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,"
+                        " error = ?, updated = ?, notbefore = ? + ? * (1 << (attempts - 1))"
+                        " WHERE fregfrom = ? AND fregto = ? AND page = ?",
+                        (self.maxAttempts, error, now, now, self.backoffSeconds) + tuple(job))
+
+    def release(self, worker):
+        """Gibt die laufenden Aufträge von *worker* frei, z.B. nach dessen Absturz und Neustart."""
+        with self._transaction() as con:
+            return con.execute("UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,"
+                               " error = 'Worker neu gestartet', updated = ?, notbefore = NULL"
+                               " WHERE status = 'running' AND worker = ?",
+                               (self.maxAttempts, time.time(), worker)).rowcount
+
+    def nextDue(self):
+        """Zeitpunkt, ab dem der nächste Auftrag fällig ist, oder None, wenn keiner mehr offen ist.
+
+        Laufende Aufträge werden spätestens nach Ablauf ihrer Reservierung fällig
+        (erneut vergeben bzw. als fehlgeschlagen markiert).
+        """
+        with self._transaction() as con:
+            return con.execute("SELECT min(due) FROM (SELECT coalesce(notbefore, 0) AS due FROM jobs"
+                               " WHERE status = 'pending' AND attempts < ?"
+                               " UNION ALL SELECT updated + ? FROM jobs WHERE status = 'running')",
+                               (self.maxAttempts, self.leaseSeconds)).fetchone()[0]
+
+    def retryFailed(self):
+        """Setzt fehlgeschlagene Aufträge für einen neuen Lauf zurück."""
+        with self._transaction() as con:
+            return con.execute("UPDATE jobs SET status = 'pending', attempts = 0, notbefore = NULL"
+                               " WHERE status = 'failed'").rowcount
+
+    def progress(self):
+        """Anzahl der Aufträge je Status."""
+        with self._transaction() as con:
+            return dict(con.execute("SELECT status, count(*) FROM jobs GROUP BY status").fetchall())
+
+    def unfinishedJobs(self):
+        """Alle Aufträge, die nicht erledigt sind, mit Status und letztem Fehler."""
+        with self._transaction() as con:
+            return con.execute("SELECT fregfrom, fregto, page, status, error FROM jobs WHERE status != 'done'"
+                               " ORDER BY fregfrom, page").fetchall()
+
+    def failedJobs(self):
+        with self._transaction() as con:
+            return con.execute("SELECT fregfrom, fregto, page, attempts, error FROM jobs WHERE status = 'failed'"
+                               " ORDER BY fregfrom, page").fetchall()
+
+
+def _writeBatch(pageCarDFs, checkpointDir):
+    """Schreibt einen Batch je Erstzulassungsjahr; die Datei erscheint erst vollständig (os.replace)."""
+    paths = []
+    for freg, dfs in pageCarDFs.items():
+        directory = os.path.join(checkpointDir, "freg=%d" % freg)
+        os.makedirs(directory, exist_ok=True)
+        batchDF = pd.concat(dfs, axis=0, ignore_index=True)
+        try:
+            import pyarrow  # noqa: F401
+            ext = "parquet"
+        except ImportError:
+            ext = "pkl"
+        path = os.path.join(directory, "part-%s.%s" % (uuid.uuid4().hex, ext))
+        tmp = path + ".tmp"
+        if ext == "parquet":
+            batchDF.to_parquet(tmp, index=False)
+        else:
+            batchDF.to_pickle(tmp)
+        os.replace(tmp, path)
+        paths.append(path)
+    return paths
+
+
+def drainQueue(queue, checkpointDir=DEFAULT_CHECKPOINT_DIR, batchSize=BATCH_SIZE, worker=None,
+               fetch=crawl.extractPageCarDF, sleep=time.sleep):
+    """Arbeitet Aufträge ab, bis kein Auftrag mehr offen ist. Gibt (erledigt, fehlgeschlagen) zurück.
+
+    Aufträge, die ein früherer Lauf unter demselben *worker* reserviert hat,
+    werden zuerst freigegeben. Warten nur noch Aufträge auf ihren Backoff oder
+    laufen bei anderen Workern, wird in Abständen von höchstens POLL_SECONDS
+    erneut geprüft.
+    """
+    worker = worker or "%s-%d" % (socket.gethostname(), os.getpid())
+    queue.release(worker)
+    done = failed = 0
+    while True:
+        jobs = queue.claim(batchSize, worker)
+        if not jobs:
+            due = queue.nextDue()
+            if due is None:
+                return done, failed
+            sleep(min(max(due - time.time(), 0.01), POLL_SECONDS))
+            continue
+        pageCarDFs, completed = {}, []
+        for job in jobs:
+            fregfrom, fregto, page = job
+            try:
+                pageCarDF = fetch(crawl.buildURL(fregfrom, page, fregto))
+            except Exception as e:
+                queue.fail(job, "%s: %s" % (type(e).__name__, e))
+                failed += 1
+                continue
+            pageCarDFs.setdefault(fregfrom, []).append(pageCarDF)
+            completed.append(job)
+        #erst speichern, dann als erledigt markieren
+        _writeBatch(pageCarDFs, checkpointDir)
+        queue.complete(completed)
+        METRICS.inc("crawl_jobs_done_total", len(completed))
+        done += len(completed)
+
+
+def loadCheckpoints(checkpointDir=DEFAULT_CHECKPOINT_DIR, fregList=None):
+    """Lädt die gecrawlten Batches als Dictionary Erstzulassungsjahr -> AutoDFraw-Partition."""
+    partitions = {}
+    if not os.path.isdir(checkpointDir):
+        return partitions
+    for name in sorted(os.listdir(checkpointDir)):
+        if not name.startswith("freg="):
+            continue
+        freg = int(name.split("=", 1)[1])
+        if fregList is not None and freg not in fregList:
+            continue
+        directory = os.path.join(checkpointDir, name)
+        parts = [pd.read_parquet(os.path.join(directory, f)) if f.endswith(".parquet")
+                 else pd.read_pickle(os.path.join(directory, f))
+                 for f in sorted(os.listdir(directory)) if f.endswith((".parquet", ".pkl"))]
+        if parts:
+            AutoDFyear = pd.concat(parts, axis=0, ignore_index=True)
+            #doppelt gecrawlte Seiten (Abbruch zwischen Speichern und Markieren) entfernen;
+            #Inserate ohne ID lassen sich nicht zuordnen und bleiben erhalten
+            duplicated = AutoDFyear["ID"].notna() & AutoDFyear.duplicated("ID")
+            partitions[freg] = AutoDFyear[~duplicated].reset_index(drop=True)
+    return partitions
+
+
+def _drainProcess(path, checkpointDir, batchSize, worker):
+    return drainQueue(CrawlQueue(path), checkpointDir, batchSize, worker)
+
+
+def main(argv=None):
+    from .cli import parseYears
+
+    parser = argparse.ArgumentParser(description="Fortsetzbarer Autoscout24 Crawl über eine SQLite Warteschlange")
+    parser.add_argument("--queue", default=DEFAULT_QUEUE)
+    parser.add_argument("--checkpoint-dir", default=DEFAULT_CHECKPOINT_DIR)
+    parser.add_argument("--years", type=parseYears, help="Aufträge für diese Jahre anlegen, z.B. 2015-2020")
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--processes", type=int, default=1, help="Anzahl Worker-Prozesse")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--retry-failed", action="store_true", help="fehlgeschlagene Aufträge erneut versuchen")
+    args = parser.parse_args(argv)
+
+    queue = CrawlQueue(args.queue)
+    if args.years:
+        queue.enqueue(args.years, args.pages)
+    if args.retry_failed:
+        queue.retryFailed()
+
+    jobs = [(args.queue, args.checkpoint_dir, args.batch_size, "worker-%d" % i) for i in range(args.processes)]
+    if args.processes > 1:
+        with multiprocessing.Pool(args.processes) as pool:
+            results = pool.starmap(_drainProcess, jobs)
+    else:
+        results = [_drainProcess(*jobs[0])]
+
+    progress = queue.progress()
+    json.dump({"done": sum(d for d, _ in results), "retried_or_failed": sum(f for _, f in results),
+               "progress": progress, "failed_jobs": queue.failedJobs()}, sys.stdout, indent=2)
+    print()
+    return 1 if progress.get("failed") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
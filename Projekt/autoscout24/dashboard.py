@@ -0,0 +1,254 @@
+"""Lokales Dashboard mit voraggregierten Daten.
+
+*DashboardCube* fasst AutoDF einmalig zu Zellen je (Marke, Kraftstoff,
+Getriebe, Erstzulassung) zusammen. Je Zelle werden gespeichert:
+
+* Anzahl, Preissumme, minimaler/maximaler Preis und die Summen für die
+  OLS-Trendlinie Preis ~ PS
+* ein Preis-Histogramm mit festen Bins (Anzeige) und eines mit
+  Quantil-Bins (Quartile für die Boxplots)
+* bis zu MAX_POINTS zufällig gezogene Fahrzeuge für den Scatterplot
+
+Ein Filter wählt nur noch Zellen aus. Alle Grafiken ergeben sich aus Summen
+über die ausgewählten Zeilen, unabhängig von der Anzahl der Fahrzeuge. Die
+Antworten werden zusätzlich je Filterkombination zwischengespeichert::
+
+    python -m autoscout24.dashboard AutoDF_vor_Replace.xlsx --save-cube cube.pkl
+    python -m autoscout24.dashboard --cube cube.pkl --port 8050
+"""
+
+import argparse
+import collections
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objs as go
+
+from .viz import HISTOGRAM_BINS, MAX_POINTS, _aggregatedBox
+
+DIMENSIONS = ["Marke", "Kraftstoff", "Getriebe", "Erstzulassung"]
+QUANTILE_BINS = 256
+CACHE_SIZE = 256
+
+
+def _binnedQuantiles(counts, edges, q):
+    """Quantil *q* je Zeile aus Histogramm-Zählern (lineare Interpolation im Bin)."""
+    cum = counts.cumsum(axis=1)
+    target = q * cum[:, -1]
+    idx = np.minimum((cum < target[:, None]).sum(axis=1), counts.shape[1] - 1)
+    rows = np.arange(len(counts))
+    inBin = counts[rows, idx]
+    frac = (target - (cum[rows, idx] - inBin)) / np.maximum(inBin, 1)
+    return edges[idx] + frac * (edges[idx + 1] - edges[idx])
+
+
+class DashboardCube:
+    """Voraggregierte Zellen des AutoDF für schnelle Filterabfragen."""
+
+    def __init__(self, AutoDF, maxPoints=MAX_POINTS, seed=0):
+        df = AutoDF[DIMENSIONS + ["Preis", "PS"]].dropna(subset=["Preis", "PS"])
+        preis = df["Preis"].to_numpy(dtype=float)
+        ps = df["PS"].to_numpy(dtype=float)
+        self.maxPoints = maxPoints
+
+        grouped = df.groupby(DIMENSIONS, observed=True, dropna=False)
+        cellCodes = grouped.ngroup().to_numpy()
+        self.cells = grouped.size().index.to_frame(index=False)
+        for col in ["Marke", "Kraftstoff", "Getriebe"]:
+            self.cells[col] = self.cells[col].astype(object)
+        nCells = len(self.cells)
+
+        def cellSum(values):
+            return np.bincount(cellCodes, weights=values, minlength=nCells)
+
+        self.cells["n"] = np.bincount(cellCodes, minlength=nCells)
+        self.cells["sumPreis"] = cellSum(preis)
+        self.cells["sumPS"] = cellSum(ps)
+        self.cells["sumPSPS"] = cellSum(ps * ps)
+        self.cells["sumPSPreis"] = cellSum(ps * preis)
+        grouped = pd.Series(preis).groupby(cellCodes)
+        self.cells["minPreis"] = grouped.min().to_numpy()
+        self.cells["maxPreis"] = grouped.max().to_numpy()
+
+        #Histogramme je Zelle: feste Bins für die Anzeige, Quantil-Bins für die Boxplots
+        self.edges = np.linspace(preis.min(), preis.max(), HISTOGRAM_BINS + 1)
+        self.quantileEdges = np.unique(np.quantile(preis, np.linspace(0, 1, QUANTILE_BINS + 1)))
+        self.histogram = self._cellHistogram(cellCodes, preis, self.edges, nCells)
+        self.quantileHistogram = self._cellHistogram(cellCodes, preis, self.quantileEdges, nCells)
+
+        #zufällige Fahrzeuge je Zelle, nach Zelle sortiert
+        order = np.random.default_rng(seed).permutation(len(df))
+        sample = pd.DataFrame({"cell": cellCodes[order], "PS": ps[order], "Preis": preis[order]})
+        sample = sample.groupby("cell", sort=True).head(maxPoints).sort_values("cell", kind="stable")
+        self.sampleCells = sample["cell"].to_numpy()
+        self.samplePS = sample["PS"].to_numpy()
+        self.samplePreis = sample["Preis"].to_numpy()
+        self.sampleOffsets = np.searchsorted(self.sampleCells, np.arange(nCells + 1))
+
+        self._cache = collections.OrderedDict()
+
+    @staticmethod
+    def _cellHistogram(cellCodes, values, edges, nCells):
+        bins = np.clip(np.searchsorted(edges, values, side="right") - 1, 0, len(edges) - 2)
+        counts = np.bincount(cellCodes * (len(edges) - 1) + bins, minlength=nCells * (len(edges) - 1))
+        return counts.reshape(nCells, len(edges) - 1).astype(np.int32)
+
+    def options(self):
+        """Auswahlmöglichkeiten der Filter."""
+        years = pd.to_numeric(self.cells["Erstzulassung"], errors="coerce")
+        return {
+            "Marke": sorted(self.cells["Marke"].dropna().unique()),
+            "Kraftstoff": sorted(self.cells["Kraftstoff"].dropna().unique()),
+            "Getriebe": sorted(self.cells["Getriebe"].dropna().unique()),
+            "Erstzulassung": (int(years.min()), int(years.max())),
+        }
+
+    def select(self, marke=None, kraftstoff=None, getriebe=None, jahrVon=None, jahrBis=None):
+        """Maske der Zellen, die zum Filter passen (leere Auswahl = alle)."""
+        mask = np.ones(len(self.cells), dtype=bool)
+        for col, values in [("Marke", marke), ("Kraftstoff", kraftstoff), ("Getriebe", getriebe)]:
+            if values:
+                mask &= self.cells[col].isin(values).to_numpy()
+        years = pd.to_numeric(self.cells["Erstzulassung"], errors="coerce").to_numpy()
+        if jahrVon is not None:
+            mask &= years >= jahrVon
+        if jahrBis is not None:
+            mask &= years <= jahrBis
+        return mask
+
+    def _sample(self, mask):
+        """Proportionale Stichprobe von bis zu maxPoints Fahrzeugen aus den gewählten Zellen."""
+        selected = np.flatnonzero(mask)
+        n = self.cells["n"].to_numpy()[selected]
+        if n.sum() == 0:
+            return np.array([]), np.array([])
+        take = np.minimum(np.ceil(self.maxPoints * n / n.sum()).astype(int),
+                          self.sampleOffsets[selected + 1] - self.sampleOffsets[selected])
+        starts = np.repeat(self.sampleOffsets[selected], take)
+        rows = starts + np.arange(take.sum()) - np.repeat(np.cumsum(take) - take, take)
+        return self.samplePS[rows], self.samplePreis[rows]
+
+    def histogramFigure(self, mask):
+        counts = self.histogram[mask].sum(axis=0)
+        centers = (self.edges[:-1] + self.edges[1:]) / 2
+        fig = go.Figure(go.Bar(x=centers, y=counts, width=np.diff(self.edges)))
+        fig.update_layout(title_text="Distribution over price (Euro)", xaxis_title="Preis", yaxis_title="count", bargap=0)
+        return fig
+
+    def boxFigure(self, mask):
+        cells = self.cells[mask]
+        counts = pd.DataFrame(self.quantileHistogram[mask]).groupby(cells["Marke"].to_numpy()).sum()
+        stats = pd.DataFrame(index=counts.index)
+        for name, q in [("q1", 0.25), ("median", 0.5), ("q3", 0.75)]:
+            stats[name] = _binnedQuantiles(counts.to_numpy(), self.quantileEdges, q)
+        extremes = cells.groupby("Marke")[["minPreis", "maxPreis"]].agg({"minPreis": "min", "maxPreis": "max"})
+        iqr = stats["q3"] - stats["q1"]
+        stats["lowerfence"] = np.maximum(stats["q1"] - 1.5 * iqr, extremes["minPreis"])
+        stats["upperfence"] = np.minimum(stats["q3"] + 1.5 * iqr, extremes["maxPreis"])
+        return _aggregatedBox(stats.sort_values("median"), horizontal=True, xTitle="Preis", yTitle="Marke")
+
+    def kraftstoffFigure(self, mask):
+        sums = self.cells[mask].groupby("Kraftstoff")[["sumPreis", "n"]].sum()
+        fig = go.Figure(go.Bar(x=sums.index.astype(str), y=sums["sumPreis"] / sums["n"]))
+        fig.update_layout(title_text="Durschnittlicher Preis nach Kraftstoff")
+        return fig
+
+    def scatterFigure(self, mask):
+        ps, preis = self._sample(mask)
+        fig = go.Figure(go.Scattergl(x=ps, y=preis, mode="markers", marker=dict(size=4, opacity=0.5), showlegend=False))
+        sums = self.cells.loc[mask, ["n", "sumPS", "sumPreis", "sumPSPS", "sumPSPreis"]].sum()
+        varPS = sums["sumPSPS"] - sums["sumPS"] ** 2 / max(sums["n"], 1)
+        if len(ps) and varPS > 0:
+            #OLS Trendlinie aus den Summen aller ausgewählten Fahrzeuge
+            slope = (sums["sumPSPreis"] - sums["sumPS"] * sums["sumPreis"] / sums["n"]) / varPS
+            intercept = (sums["sumPreis"] - slope * sums["sumPS"]) / sums["n"]
+            x = np.array([ps.min(), ps.max()])
+            fig.add_trace(go.Scatter(x=x, y=slope * x + intercept, mode="lines", name="OLS trendline", showlegend=False))
+        fig.update_layout(title_text="Price over PS", xaxis_title="PS", yaxis_title="Preis")
+        return fig
+
+    def figures(self, marke=None, kraftstoff=None, getriebe=None, jahrVon=None, jahrBis=None):
+        """Alle vier Grafiken zu einem Filter, zwischengespeichert je Filterkombination."""
+        key = (tuple(sorted(marke or ())), tuple(sorted(kraftstoff or ())), tuple(sorted(getriebe or ())),
+               jahrVon, jahrBis)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        mask = self.select(marke, kraftstoff, getriebe, jahrVon, jahrBis)
+        result = {
+            "histogram": self.histogramFigure(mask),
+            "box_marke": self.boxFigure(mask),
+            "bar_kraftstoff": self.kraftstoffFigure(mask),
+            "scatter_ps": self.scatterFigure(mask),
+        }
+        self._cache[key] = result
+        if len(self._cache) > CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return result
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_cache"] = collections.OrderedDict()
+        return state
+
+    def save(self, path):
+        pd.to_pickle(self, path)
+
+    @staticmethod
+    def load(path):
+        return pd.read_pickle(path)
+
+
+def createApp(cube):
+    """Dash-App mit Filtern für Marke, Kraftstoff, Getriebe und Erstzulassung."""
+    from dash import Dash, Input, Output, dcc, html
+
+    options = cube.options()
+    yearFrom, yearTo = options["Erstzulassung"]
+    app = Dash(__name__)
+    app.layout = html.Div([
+        html.Div([
+            dcc.Dropdown(options["Marke"], multi=True, id="marke", placeholder="Marke"),
+            dcc.Dropdown(options["Kraftstoff"], multi=True, id="kraftstoff", placeholder="Kraftstoff"),
+            dcc.Dropdown(options["Getriebe"], multi=True, id="getriebe", placeholder="Getriebe"),
+            dcc.RangeSlider(yearFrom, yearTo, 1, value=[yearFrom, yearTo], id="jahre",
+                            marks=None, tooltip={"placement": "bottom"}),
+        ]),
+        html.Div([dcc.Graph(id=name) for name in ["histogram", "box_marke", "bar_kraftstoff", "scatter_ps"]]),
+    ])
+
+    @app.callback([Output(name, "figure") for name in ["histogram", "box_marke", "bar_kraftstoff", "scatter_ps"]],
+                  [Input("marke", "value"), Input("kraftstoff", "value"), Input("getriebe", "value"),
+                   Input("jahre", "value")])
+    def update(marke, kraftstoff, getriebe, jahre):
+        figures = cube.figures(marke, kraftstoff, getriebe, jahre[0], jahre[1])
+        return [figures[name] for name in ["histogram", "box_marke", "bar_kraftstoff", "scatter_ps"]]
+
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Autoscout24 Dashboard")
+    parser.add_argument("source", nargs="?", help="AutoDF bzw. AutoDFraw (.pkl, .parquet oder Excel-Backup)")
+    parser.add_argument("--cube", help="voraggregierten Cube laden")
+    parser.add_argument("--save-cube", help="Cube speichern und beenden")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8050)
+    args = parser.parse_args(argv)
+
+    if args.cube:
+        cube = DashboardCube.load(args.cube)
+    elif args.source:
+        from .synthetic import loadSource
+
+        cube = DashboardCube(loadSource(args.source))
+    else:
+        parser.error("source oder --cube angeben")
+    if args.save_cube:
+        cube.save(args.save_cube)
+        return
+    createApp(cube).run(host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Erkennung mehrfach eingestellter Inserate (Near-Duplicates).
+
+Händler stellen dasselbe Fahrzeug oft mehrfach ein, mit leicht geändertem
+Titel/Untertitel oder in einer anderen Stadt. Ein Vergleich aller Paare ist bei
+hunderttausenden Inseraten nicht möglich. Daher:
+
+1. Blocking: nur Inserate mit gleicher Marke, Erstzulassung, PS und ähnlichem
+   Kilometerstand (Bucket von KM_BUCKET km) sind Kandidaten. Ein zweites, um
+   einen halben Bucket verschobenes Raster findet auch Paare an Bucket-Grenzen.
+2. MinHash über die Wörter aus Titel, Version und Untertitel, vektorisiert
+   über alle Inserate berechnet.
+3. LSH: Die Signatur wird in BANDS Bänder geteilt. Kandidaten sind Inserate,
+   die im selben Block in mindestens einem Band übereinstimmen.
+4. Die geschätzte Jaccard-Ähnlichkeit der Kandidatenpaare wird gegen
+   *threshold* geprüft und Duplikate werden zu Gruppen zusammengefasst.
+
+Der Aufwand wächst damit nahezu linear mit der Anzahl der Inserate::
+
+    AutoDF, duplicates = dropDuplicateListings(AutoDF)
+"""
+
+import numpy as np
+import pandas as pd
+
+from .metrics import METRICS
+
+TEXT_COLUMNS = ["Titel", "Version", "Untertitel"]
+BLOCK_COLUMNS = ["Marke", "Erstzulassung", "PS"]
+KM_BUCKET = 5000
+NUM_PERM = 64
+BANDS = 16
+THRESHOLD = 0.8
+CHUNK_SIZE = 50000
+
+#größte Primzahl unter 2**32, damit die Signaturen als uint32 gespeichert werden können
+_PRIME = np.uint64(4294967291)
+
+
+def _permutations(seed=0):
+    rng = np.random.default_rng(seed)
+    #a < 2**31 und Hashes < 2**32, damit a * h + b nicht überläuft
+    return (rng.integers(1, 2 ** 31, NUM_PERM, dtype=np.uint64),
+            rng.integers(0, 2 ** 31, NUM_PERM, dtype=np.uint64))
+
+
+def _tokens(AutoDF):
+    text = AutoDF[TEXT_COLUMNS[0]].astype(object).fillna("")
+    for col in TEXT_COLUMNS[1:]:
+        if col in AutoDF.columns:
+            text = text + " " + AutoDF[col].astype(object).fillna("")
+    #Wortmengen; doppelte Wörter (z.B. die Version in älteren Titeln) zählen einmal
+    return text.str.lower().str.split().map(lambda words: list(set(words)))
+
+
+def minhashSignatures(AutoDF, seed=0):
+    """MinHash-Signaturen (NUM_PERM Werte je Inserat) und Maske der Inserate mit Text."""
+    a, b = _permutations(seed)
+    tokens = _tokens(AutoDF).reset_index(drop=True)
+    signatures = np.full((len(tokens), NUM_PERM), np.iinfo(np.uint32).max, dtype=np.uint32)
+    for start in range(0, len(tokens), CHUNK_SIZE):
+        exploded = tokens.iloc[start:start + CHUNK_SIZE].explode().dropna()
+        if exploded.empty:
+            continue
+        #Permutationen nur einmal je verschiedenem Wort berechnen
+        codes, words = pd.factorize(exploded)
+        hashes = pd.util.hash_array(words.to_numpy(dtype=object)) & np.uint64(0xFFFFFFFF)
+        values = ((hashes[:, None] * a + b) % _PRIME).astype(np.uint32)[codes]
+        rows = exploded.index.to_numpy()
+        starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+        signatures[rows[starts]] = np.minimum.reduceat(values, starts, axis=0)
+    hasText = tokens.map(len).to_numpy() > 0
+    return signatures, hasText
+
+
+def _blockCodes(AutoDF, offset):
+    km = pd.to_numeric(AutoDF["km"], errors="coerce")
+    keys = [AutoDF[col].astype(object) for col in BLOCK_COLUMNS] + [(km + offset) // KM_BUCKET]
+    codes, _ = pd.factorize(pd.MultiIndex.from_arrays(keys))
+    #fehlende Merkmale (Code -1 einzelner Ebenen) ergeben keinen Block
+    missing = pd.concat(keys, axis=1).isna().any(axis=1).to_numpy()
+    codes[missing] = -1
+    return codes
+
+
+def candidatePairs(AutoDF, signatures, hasText):
+    """Kandidatenpaare (Positionen i < j) aus Blocking und LSH-Bändern.
+
+    Innerhalb einer Gruppe gleicher Band-Signatur wird jedes Inserat mit dem
+    ersten Inserat der Gruppe gepaart; die Gruppen werden später transitiv
+    zusammengefasst.
+    """
+    rowsPerBand = NUM_PERM // BANDS
+    #Band-Signatur: die Werte eines Bands zu einem 64 Bit Schlüssel mischen
+    mix = np.random.default_rng(1).integers(1, 2 ** 63, rowsPerBand, dtype=np.uint64) | np.uint64(1)
+    pairs = []
+    for offset in (0, KM_BUCKET // 2):
+        blocks = _blockCodes(AutoDF, offset)
+        positions = np.flatnonzero((blocks >= 0) & hasText)
+        for band in range(BANDS):
+            part = signatures[positions, band * rowsPerBand:(band + 1) * rowsPerBand].astype(np.uint64)
+            groups = pd.DataFrame({"block": blocks[positions], "key": (part * mix).sum(axis=1), "pos": positions})
+            first = groups.groupby(["block", "key"], sort=False)["pos"].transform("min").to_numpy()
+            candidate = first != positions
+            pairs.append(np.column_stack([first[candidate], positions[candidate]]))
+    pairs = np.concatenate(pairs) if pairs else np.empty((0, 2), dtype=np.int64)
+    return np.unique(pairs, axis=0)
+
+
+def _clusters(n, pairs):
+    """Position des ersten Inserats der jeweiligen Duplikatgruppe (Zusammenhangskomponenten)."""
+    labels = np.arange(n)
+    #kleinste Position über die Kanten propagieren, bis sich nichts mehr ändert
+    while len(pairs):
+        before = labels.copy()
+        low = np.minimum(labels[pairs[:, 0]], labels[pairs[:, 1]])
+        np.minimum.at(labels, pairs[:, 0], low)
+        np.minimum.at(labels, pairs[:, 1], low)
+        labels = labels[labels]
+        if np.array_equal(labels, before):
+            break
+    return labels
+
+
+def findDuplicates(AutoDF, threshold=THRESHOLD, seed=0):
+    """Gibt je Inserat die Position des behaltenen Inserats seiner Duplikatgruppe zurück.
+
+    Inserate ohne Duplikat verweisen auf sich selbst. Behalten wird jeweils das
+    zuerst gecrawlte Inserat.
+    """
+    signatures, hasText = minhashSignatures(AutoDF, seed)
+    pairs = candidatePairs(AutoDF, signatures, hasText)
+    if len(pairs):
+        similarity = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+        pairs = pairs[similarity >= threshold]
+    return pd.Series(_clusters(len(AutoDF), pairs), index=AutoDF.index, name="Duplikatgruppe")
+
+
+def dropDuplicateListings(AutoDF, threshold=THRESHOLD, seed=0):
+    """Entfernt Duplikate und gibt (AutoDF, Duplikate mit Spalte "Duplikat_von") zurück.
+
+    "Duplikat_von" enthält die ID (bzw. den Index) des behaltenen Inserats.
+    """
+    group = findDuplicates(AutoDF, threshold, seed).to_numpy()
+    isDuplicate = group != np.arange(len(AutoDF))
+    keys = AutoDF["ID"].to_numpy() if "ID" in AutoDF.columns else AutoDF.index.to_numpy()
+    duplicates = AutoDF[isDuplicate].copy()
+    duplicates["Duplikat_von"] = keys[group[isDuplicate]]
+    METRICS.inc("rows_dropped_total", int(isDuplicate.sum()), stage="dedup")
+    return AutoDF[~isDuplicate], duplicates
@@ -0,0 +1,162 @@
+"""Anreicherung der Inserate über deren Detailseiten.
+
+Die Suchergebnisseiten liefern nur die neun Felder der VehicleDetailTable. Die
+Detailseite eines Inserats enthält zusätzlich die vollständige Ausstattungsliste
+und technische Daten (Hubraum, Gänge, Leergewicht, ...).
+
+*enrichAutoDF* lädt die Detailseiten nebenläufig mit einem eigenen
+Worker-Budget und speichert jedes Ergebnis im *DetailCache*. Ein Inserat wird
+übersprungen, wenn es bereits im Cache liegt und sich seine Daten auf der
+Suchergebnisseite (Preis, km, Titel, ...) nicht geändert haben. Ansonsten wird
+die Seite mit If-None-Match/If-Modified-Since angefragt und nur bei einer
+Änderung neu geparst. Der Aufwand wächst damit mit den neuen Inseraten, nicht
+mit dem Gesamtbestand.
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from .metrics import METRICS
+
+DEFAULT_CACHE_DIR = ".detail_cache"
+
+# Felder der Suchergebnisseite, deren Änderung ein erneutes Laden auslöst
+FINGERPRINT_COLUMNS = ["Titel", "Version", "Untertitel", "Preis", "km"]
+
+# Abschnitte der Detailseite (id des section Elements)
+EQUIPMENT_SECTION = "equipment-section"
+
+
+def fingerprint(car):
+    """Hash der Daten eines Inserats auf der Suchergebnisseite."""
+    values = [str(car.get(col, "")) for col in FINGERPRINT_COLUMNS]
+    return hashlib.sha256("\x1f".join(values).encode()).hexdigest()[:16]
+
+
+class DetailCache:
+    """Je Inserat eine JSON-Datei mit Fingerprint, ETag/Last-Modified und Ergebnis."""
+
+    def __init__(self, cacheDir=DEFAULT_CACHE_DIR):
+        self.cacheDir = cacheDir
+        os.makedirs(cacheDir, exist_ok=True)
+
+    def _path(self, listingID):
+        name = hashlib.sha1(str(listingID).encode()).hexdigest()
+        return os.path.join(self.cacheDir, name[:2], name + ".json")
+
+    def get(self, listingID):
+        try:
+            with open(self._path(listingID), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, listingID, entry):
+        path = self._path(listingID)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+
+def parseDetailPage(html):
+    """Extrahiert Ausstattungsliste und technische Daten einer Detailseite."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    equipment, technical = [], {}
+    for section in soup.findAll("section"):
+        isEquipment = section.get("id") == EQUIPMENT_SECTION
+        for dl in section.findAll("dl"):
+            for dt in dl.findAll("dt"):
+                dd = dt.find_next_sibling("dd")
+                if dd is None:
+                    continue
+                if isEquipment:
+                    items = [li.text.strip() for li in dd.findAll("li")] or [dd.text.strip()]
+                    equipment.extend(items)
+                else:
+                    technical[dt.text.strip()] = dd.text.strip()
+    if not equipment:
+        METRICS.inc("parse_failures_total", selector=EQUIPMENT_SECTION)
+    if not technical:
+        METRICS.inc("parse_failures_total", selector="technical dl")
+    return {"Ausstattung": equipment, "Technik": technical}
+
+
+def fetchDetail(link, cached=None, timeout=30):
+    """Lädt eine Detailseite bedingt. Gibt (Status, HTML oder None, Header) zurück."""
+    import requests
+
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+    with METRICS.timer("detail_fetch_seconds"):
+        response = requests.get(link, headers=headers, timeout=timeout)
+    if response.status_code == 304:
+        return 304, None, response.headers
+    response.raise_for_status()
+    return response.status_code, response.text, response.headers
+
+
+def enrichListing(car, cache, fetch=fetchDetail):
+    """Detaildaten eines Inserats aus dem Cache oder von der Detailseite."""
+    listingID = car["ID"]
+    cached = cache.get(listingID)
+    carFingerprint = fingerprint(car)
+    if cached and cached.get("fingerprint") == carFingerprint:
+        METRICS.inc("detail_pages_total", result="cached")
+        return cached["data"]
+
+    status, html, headers = fetch(car["Link"], cached)
+    if status == 304 and cached:
+        METRICS.inc("detail_pages_total", result="not_modified")
+        data = cached["data"]
+    elif html is not None:
+        METRICS.inc("detail_pages_total", result="fetched")
+        data = parseDetailPage(html)
+    else:
+        #304 ohne Cache-Eintrag: es gibt nichts, was wiederverwendet werden könnte
+        raise ValueError("Detailseite %s ohne Inhalt (Status %s)" % (car["Link"], status))
+    cache.put(listingID, {"fingerprint": carFingerprint, "etag": headers.get("ETag"),
+                          "last_modified": headers.get("Last-Modified"), "data": data})
+    return data
+
+
+def enrichAutoDF(AutoDF, cacheDir=DEFAULT_CACHE_DIR, workers=4, fetch=fetchDetail):
+    """Ergänzt AutoDF um die Spalte Ausstattung und die technischen Daten.
+
+    Ausstattung ist wie Untertitel ein kommagetrennter Text, sodass die
+    Ausstattungsmerkmale mit str.contains abgefragt werden können.
+
+    *workers* ist das Worker-Budget für die Detailseiten, unabhängig vom Crawl
+    der Suchergebnisseiten. Fehlgeschlagene Inserate bleiben ohne Detaildaten.
+    """
+    cache = DetailCache(cacheDir)
+    cars = AutoDF[["ID", "Link"] + [c for c in FINGERPRINT_COLUMNS if c in AutoDF.columns]]
+    cars = cars.dropna(subset=["ID", "Link"]).drop_duplicates("ID").to_dict("records")
+
+    def job(car):
+        try:
+            return car["ID"], enrichListing(car, cache, fetch)
+        except Exception:
+            METRICS.inc("detail_pages_total", result="failed")
+            return car["ID"], None
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        details = {listingID: data for listingID, data in executor.map(job, cars) if data is not None}
+
+    detailDF = pd.DataFrame.from_dict({listingID: data["Technik"] for listingID, data in details.items()}, orient="index")
+    detailDF["Ausstattung"] = pd.Series({listingID: ", ".join(data["Ausstattung"]) for listingID, data in details.items()},
+                                        dtype=object)
+    detailDF.index.name = "ID"
+    detailDF = detailDF.drop(columns=[c for c in detailDF.columns if c in AutoDF.columns and c != "ID"])
+    return AutoDF.join(detailDF, on="ID")
@@ -0,0 +1,39 @@
+"""Geokodierung der Fahrzeugstandorte und Kartenvisualisierung."""
+
+import pandas as pd
+
+
+def geocodeCities(AutoDFsmall, user_agent="my_app"):
+    """Ordnet jeder Stadt in AutoDFsmall Longitude und Latitude zu (geoDF).
+
+    Jede Stadt wird nur einmal geokodiert; geoDF enthält eine Zeile je Stadt.
+    """
+    from geopy.geocoders import Nominatim
+
+    geolocator = Nominatim(user_agent=user_agent)
+    locations = []
+    for city in AutoDFsmall['Stadt'].dropna().unique():
+        try:
+            location = geolocator.geocode(city)
+            locations.append({"Stadt": city, "longitude": location.longitude, "latitude": location.latitude})
+        except Exception:
+            locations.append({"Stadt": city, "longitude": None, "latitude": None})
+    return pd.DataFrame(locations, columns=["Stadt", "longitude", "latitude"])
+
+
+def joinGeoDF(AutoDFsmall, geoDF):
+    """Join von AutoDFsmall und geoDF über den Stadtnamen (Index von AutoDFsmall bleibt erhalten)."""
+    return AutoDFsmall.join(geoDF.set_index("Stadt"), on="Stadt")
+
+
+def carMap(AutoDFgeo):
+    """Folium Map mit einem Marker (Stadt, Titel, Preis) je Fahrzeug."""
+    import folium
+
+    m = folium.Map([50.0, 10.0], zoom_start=4)
+    for i in AutoDFgeo.index:
+        if pd.isna(AutoDFgeo['latitude'][i]) or pd.isna(AutoDFgeo['longitude'][i]):
+            continue
+        folium.Marker(location=[AutoDFgeo['latitude'][i], AutoDFgeo['longitude'][i]],
+                      popup=[AutoDFgeo['Stadt'][i], AutoDFgeo['Titel'][i], AutoDFgeo['Preis'][i]]).add_to(m)
+    return m
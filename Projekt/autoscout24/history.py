@@ -0,0 +1,218 @@
+"""Preishistorie wiederholter Crawls und Wertverlustkurven.
+
+*PriceHistory* speichert jeden Crawl append-only in einer Partition je
+Crawl-Datum (``crawl_date=YYYY-MM-DD``). Über die Listing-ID ergeben sich daraus
+Preisverläufe je Inserat. Wurde das AutoDF mit *normalize.normalizeAutoDF*
+normalisiert, werden Modell, Ausstattungslinie und Modell_ID mitgespeichert.
+
+*DepreciationCurves* passt je Gruppe (standardmäßig je Marke, z.B. auch je
+Marke und Modell) ein
+Wertverlustmodell
+
+    log(Preis) = a + b * Alter + c * km / 10.000
+
+an. Alle Gruppen werden gemeinsam in einem groupby-Durchlauf (Summen der
+Normalgleichungen) und einem gestapelten np.linalg.solve geschätzt. Die Kurven
+werden für ein Raster von Fahrzeugaltern vorberechnet und können danach per
+Index-Lookup abgefragt werden.
+"""
+
+import datetime
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_ROOT = "price_history"
+HISTORY_COLUMNS = ["ID", "Marke", "Modell", "Ausstattungslinie", "Modell_ID", "Titel", "Version", "Kraftstoff",
+                   "Getriebe", "Erstzulassung", "km", "PS", "Preis"]
+MIN_OBSERVATIONS = 10
+MAX_AGE = 30
+
+
+def _partitionDate(name):
+    return datetime.date.fromisoformat(name.split("=", 1)[1])
+
+
+class PriceHistory:
+    """Append-only Preishistorie, partitioniert nach Crawl-Datum."""
+
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = root
+
+    def _format(self):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return "pkl"
+        return "parquet"
+
+    def append(self, AutoDF, crawlDate=None):
+        """Hängt einen Crawl an die Historie an und gibt den Pfad der neuen Datei zurück.
+
+        Gespeichert werden die vorhandenen Spalten aus HISTORY_COLUMNS.
+        """
+        crawlDate = crawlDate or datetime.date.today()
+        if isinstance(crawlDate, str):
+            crawlDate = datetime.date.fromisoformat(crawlDate)
+        part = AutoDF[[c for c in HISTORY_COLUMNS if c in AutoDF.columns]].copy()
+        for col in part.select_dtypes("category").columns:
+            part[col] = part[col].astype(object)
+        part["crawl_date"] = pd.Timestamp(crawlDate)
+
+        directory = os.path.join(self.root, "crawl_date=%s" % crawlDate.isoformat())
+        os.makedirs(directory, exist_ok=True)
+        fmt = self._format()
+        #eindeutiger Dateiname, bestehende Dateien werden nie überschrieben
+        path = os.path.join(directory, "part-%s.%s" % (uuid.uuid4().hex, fmt))
+        if fmt == "parquet":
+            part.to_parquet(path, index=False)
+        else:
+            part.to_pickle(path)
+        return path
+
+    def partitions(self, start=None, end=None):
+        """Crawl-Daten der vorhandenen Partitionen im Zeitraum [start, end]."""
+        if not os.path.isdir(self.root):
+            return []
+        dates = sorted(_partitionDate(name) for name in os.listdir(self.root) if name.startswith("crawl_date="))
+        start = datetime.date.fromisoformat(start) if isinstance(start, str) else start
+        end = datetime.date.fromisoformat(end) if isinstance(end, str) else end
+        return [d for d in dates if (start is None or d >= start) and (end is None or d <= end)]
+
+    def load(self, start=None, end=None):
+        """Lädt alle Crawls im Zeitraum; nur die betroffenen Partitionen werden gelesen."""
+        parts = []
+        for date in self.partitions(start, end):
+            directory = os.path.join(self.root, "crawl_date=%s" % date.isoformat())
+            for name in sorted(os.listdir(directory)):
+                path = os.path.join(directory, name)
+                if name.endswith(".parquet"):
+                    parts.append(pd.read_parquet(path))
+                elif name.endswith(".pkl"):
+                    parts.append(pd.read_pickle(path))
+        if not parts:
+            return pd.DataFrame(columns=HISTORY_COLUMNS + ["crawl_date"])
+        return pd.concat(parts, axis=0, ignore_index=True)
+
+    def trajectories(self, start=None, end=None):
+        """Preisverlauf je Inserat (Zeilen: ID, Spalten: Crawl-Datum)."""
+        history = self.load(start, end).dropna(subset=["ID"])
+        history = history.drop_duplicates(["ID", "crawl_date"], keep="last")
+        return history.pivot(index="ID", columns="crawl_date", values="Preis").sort_index(axis=1)
+
+    def priceChanges(self, start=None, end=None):
+        """Erster und letzter Preis, Anzahl Beobachtungen und Änderung je Inserat."""
+        history = self.load(start, end).dropna(subset=["ID"]).sort_values("crawl_date")
+        grouped = history.groupby("ID")["Preis"]
+        changes = pd.DataFrame({"erster_Preis": grouped.first(), "letzter_Preis": grouped.last(),
+                                "Beobachtungen": grouped.size()})
+        changes["Änderung"] = changes["letzter_Preis"] - changes["erster_Preis"]
+        changes["Änderung_Prozent"] = changes["Änderung"] / changes["erster_Preis"] * 100
+        return changes
+
+
+def _designFrame(df):
+    """Alter (Jahre zum Crawl-Zeitpunkt), km in 10.000 und log(Preis)."""
+    if "crawl_date" in df.columns:
+        year = pd.to_datetime(df["crawl_date"]).dt.year
+    else:
+        year = datetime.date.today().year
+    design = pd.DataFrame({
+        "Alter": (year - df["Erstzulassung"]).astype(float).clip(lower=0),
+        "km10k": df["km"].astype(float) / 10000,
+        "logPreis": np.log(df["Preis"].astype(float).where(df["Preis"].astype(float) > 0)),
+    }, index=df.index)
+    return design
+
+
+class DepreciationCurves:
+    """Wertverlustkurven je Gruppe (z.B. Marke oder Marke/Modell)."""
+
+    def __init__(self, by=("Marke",), minObservations=MIN_OBSERVATIONS, maxAge=MAX_AGE):
+        self.by = list(by)
+        self.minObservations = minObservations
+        self.maxAge = maxAge
+        self.coefficients = None
+        self.curves = None
+
+    def fit(self, df):
+        """Schätzt die Modelle aller Gruppen gemeinsam (vektorisiert)."""
+        missing = [col for col in self.by if col not in df.columns]
+        if missing:
+            raise ValueError("Gruppierungsspalten %s fehlen; Modell und Ausstattungslinie liefert "
+                             "normalize.normalizeAutoDF vor PriceHistory.append" % ", ".join(missing))
+        design = _designFrame(df)
+        keys = [df[col].astype(object) for col in self.by]
+        design = design.assign(**{"_g%d" % i: k for i, k in enumerate(keys)}).dropna()
+        groupCols = ["_g%d" % i for i in range(len(self.by))]
+
+        # Summen für X'X und X'y mit X = [1, Alter, km10k] in einem groupby-Durchlauf
+        x1, x2, y = design["Alter"], design["km10k"], design["logPreis"]
+        products = pd.DataFrame({
+            "n": 1.0, "s1": x1, "s2": x2, "s11": x1 * x1, "s12": x1 * x2, "s22": x2 * x2,
+            "sy": y, "s1y": x1 * y, "s2y": x2 * y, "syy": y * y,
+        })
+        for col in groupCols:
+            products[col] = design[col]
+        sums = products.groupby(groupCols).sum()
+        sums = sums[sums["n"] >= self.minObservations]
+        sums.index.names = self.by
+
+        n = sums["n"].to_numpy()
+        XtX = np.stack([
+            np.stack([n, sums["s1"], sums["s2"]], axis=-1),
+            np.stack([sums["s1"], sums["s11"], sums["s12"]], axis=-1),
+            np.stack([sums["s2"], sums["s12"], sums["s22"]], axis=-1),
+        ], axis=1)
+        Xty = np.stack([sums["sy"], sums["s1y"], sums["s2y"]], axis=-1)
+        # kleine Ridge-Regularisierung, falls z.B. alle Fahrzeuge einer Gruppe gleich alt sind
+        beta = np.linalg.solve(XtX + 1e-6 * np.eye(3), Xty[..., None])[..., 0]
+
+        sse = (sums["syy"].to_numpy() - 2 * (beta * Xty).sum(axis=1)
+               + np.einsum("gi,gij,gj->g", beta, XtX, beta))
+        sst = sums["syy"].to_numpy() - sums["sy"].to_numpy() ** 2 / n
+        self.coefficients = pd.DataFrame({
+            "a": beta[:, 0], "b_Alter": beta[:, 1], "c_km10k": beta[:, 2],
+            "Wertverlust_pro_Jahr": 1 - np.exp(beta[:, 1]),
+            "r2": np.where(sst > 0, 1 - sse / np.where(sst > 0, sst, 1), np.nan),
+            "n": n.astype(int),
+            "km10k_pro_Jahr": (sums["s12"] / sums["s11"].where(sums["s11"] > 0)).fillna(0).to_numpy(),
+        }, index=sums.index)
+        self._precompute()
+        return self
+
+    def _precompute(self):
+        """Kurven für Alter 0..maxAge mit typischer Laufleistung je Gruppe."""
+        ages = np.arange(self.maxAge + 1)
+        coef = self.coefficients
+        km = np.outer(coef["km10k_pro_Jahr"], ages)
+        preis = np.exp(coef["a"].to_numpy()[:, None] + coef["b_Alter"].to_numpy()[:, None] * ages
+                       + coef["c_km10k"].to_numpy()[:, None] * km)
+        index = pd.MultiIndex.from_tuples([(k if isinstance(k, tuple) else (k,)) + (age,)
+                                           for k in coef.index for age in ages], names=self.by + ["Alter"])
+        self.curves = pd.DataFrame({"km": (km * 10000).ravel().round(), "Preis": preis.ravel().round()},
+                                   index=index).sort_index()
+
+    def curve(self, *group):
+        """Vorberechnete Kurve (Alter -> km, Preis) einer Gruppe."""
+        return self.curves.loc[group]
+
+    def predict(self, group, alter, km):
+        """Geschätzter Preis für eine Gruppe, ein Alter und einen Kilometerstand."""
+        group = group if isinstance(group, tuple) else (group,)
+        coef = self.coefficients.loc[group if len(group) > 1 else group[0]]
+        return float(np.exp(coef["a"] + coef["b_Alter"] * alter + coef["c_km10k"] * km / 10000))
+
+    def save(self, path):
+        pd.to_pickle({"by": self.by, "minObservations": self.minObservations, "maxAge": self.maxAge,
+                      "coefficients": self.coefficients, "curves": self.curves}, path)
+
+    @classmethod
+    def load(cls, path):
+        state = pd.read_pickle(path)
+        curves = cls(state["by"], state["minObservations"], state["maxAge"])
+        curves.coefficients = state["coefficients"]
+        curves.curves = state["curves"]
+        return curves
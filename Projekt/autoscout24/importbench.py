@@ -0,0 +1,64 @@
+"""Benchmark der Importzeiten je Teilsystem.
+
+Jeder Import wird in einem frischen Python-Prozess gemessen, damit keine bereits
+geladenen Module das Ergebnis verfälschen. Zum Vergleich wird der Import aller
+Bibliotheken gemessen, die das Projekt-Notebook in den ersten Zellen lädt
+(soweit installiert).
+
+    python -m autoscout24.importbench [--repeat 5] [--json]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+from . import SUBSYSTEMS
+
+# Imports der ersten Notebook-Zellen
+NOTEBOOK_IMPORTS = [
+    "pandas", "numpy", "bs4", "requests", "matplotlib.pyplot", "plotly.express", "plotly.graph_objs",
+    "plotly.io", "plotly.figure_factory", "plotly.offline", "seaborn", "folium", "geopy.geocoders",
+    "psycopg2", "sqlalchemy", "statsmodels.formula.api",
+]
+
+_TIMER = "import time\nt = time.perf_counter()\n%s\nprint(time.perf_counter() - t)"
+
+
+def timeImport(statement, repeat=5):
+    """Median der Importdauer (Sekunden) oder None, falls der Import fehlschlägt."""
+    times = []
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, "-c", _TIMER % statement], capture_output=True, text=True)
+        if proc.returncode != 0:
+            return None
+        times.append(float(proc.stdout.strip().splitlines()[-1]))
+    return statistics.median(times)
+
+
+def runBenchmark(repeat=5):
+    results = {"autoscout24": timeImport("import autoscout24", repeat)}
+    for name in SUBSYSTEMS:
+        results["autoscout24." + name] = timeImport("import autoscout24.%s" % name, repeat)
+    eager = "import importlib\nfor m in %r:\n    try: importlib.import_module(m)\n    except ImportError: pass" % NOTEBOOK_IMPORTS
+    results["notebook (eager)"] = timeImport(eager, repeat)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Ergebnis als JSON ausgeben")
+    args = parser.parse_args(argv)
+
+    results = runBenchmark(args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for name, seconds in results.items():
+        print("%-24s %s" % (name, "nicht verfügbar" if seconds is None else "%8.1f ms" % (seconds * 1000)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Instrumentierung von Crawl und Pipeline.
+
+Ein *Metrics*-Registry sammelt Zähler (z.B. Parse-Fehler je Selektor, Treffer
+je Prüfregel, entfernte Zeilen je Stage) und Histogramme von Dauern (fetch, parse, concat,
+to_sql). Die Module verwenden das gemeinsame Registry *METRICS*::
+
+    from autoscout24.metrics import METRICS
+    print(METRICS.toPrometheus())
+
+Export als JSON (*toJSON*) oder im Prometheus Textformat (*toPrometheus*).
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# Bucket-Grenzen der Dauer-Histogramme in Sekunden
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def _labelText(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join('%s="%s"' % (k, str(v).replace('"', '\\"')) for k, v in items) + "}"
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class Metrics:
+    def __init__(self, prefix="autoscout24"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.histograms = {}
+            self.started = time.time()
+
+    def inc(self, name, value=1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self.histograms.setdefault(key, Histogram()).observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Misst die Dauer des with-Blocks im Histogramm *name* (Sekunden)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def counter(self, name, **labels):
+        return self.counters.get(_key(name, labels), 0)
+
+    def rates(self):
+        """Seiten und Inserate pro Sekunde seit dem letzten reset."""
+        elapsed = max(time.time() - self.started, 1e-9)
+        pages = sum(v for (name, _), v in self.counters.items() if name == "pages_fetched_total")
+        listings = sum(v for (name, _), v in self.counters.items() if name == "listings_parsed_total")
+        return {"pages_per_second": pages / elapsed, "listings_per_second": listings / elapsed,
+                "elapsed_seconds": elapsed}
+
+    def toDict(self):
+        with self._lock:
+            counters = [{"name": name, "labels": dict(labels), "value": value}
+                        for (name, labels), value in sorted(self.counters.items())]
+            histograms = [{"name": name, "labels": dict(labels), "count": h.count, "sum": h.sum,
+                           "buckets": dict(zip(map(str, h.buckets), h.counts))}
+                          for (name, labels), h in sorted(self.histograms.items())]
+        return {"counters": counters, "histograms": histograms, "rates": self.rates()}
+
+    def toJSON(self, **kwargs):
+        return json.dumps(self.toDict(), **kwargs)
+
+    def toPrometheus(self):
+        lines = []
+        with self._lock:
+            typed = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                metric = "%s_%s" % (self.prefix, name)
+                if metric not in typed:
+                    lines.append("# TYPE %s counter" % metric)
+                    typed.add(metric)
+                lines.append("%s%s %s" % (metric, _labelText(labels), value))
+            for (name, labels), h in sorted(self.histograms.items()):
+                metric = "%s_%s" % (self.prefix, name)
+                if metric not in typed:
+                    lines.append("# TYPE %s histogram" % metric)
+                    typed.add(metric)
+                for bound, count in zip(h.buckets, h.counts):
+                    lines.append("%s_bucket%s %d" % (metric, _labelText(labels, [("le", bound)]), count))
+                lines.append("%s_bucket%s %d" % (metric, _labelText(labels, [("le", "+Inf")]), h.count))
+                lines.append("%s_sum%s %s" % (metric, _labelText(labels), h.sum))
+                lines.append("%s_count%s %d" % (metric, _labelText(labels), h.count))
+        for name, value in self.rates().items():
+            metric = "%s_%s" % (self.prefix, name)
+            lines.append("# TYPE %s gauge" % metric)
+            lines.append("%s %s" % (metric, value))
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
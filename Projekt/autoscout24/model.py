@@ -0,0 +1,9 @@
+"""Lineares Regressionsmodell zur Bestimmung des Fahrzeugpreises."""
+
+PRICE_FORMULA = 'Preis ~ PS + km + Kraftstoff + Erstzulassung + Verbrauch_l_pro_100km'
+
+
+def fitPriceModel(AutoDF, formula=PRICE_FORMULA):
+    import statsmodels.formula.api as smf
+
+    return smf.ols(formula=formula, data=AutoDF).fit()
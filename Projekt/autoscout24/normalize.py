@@ -0,0 +1,223 @@
+"""Normalisierung von Marke, Modell und Ausstattungslinie aus Titel und Version.
+
+Auf der Webseite steht im Titel (h2) nur ``<Marke> <Modell>``, z.B. ``Land
+Rover Range Rover Evoque``, die Version ``TD4 SE Dynamic`` steht in einem
+eigenen Element. Ältere Daten enthalten die Version auch am Ende des Titels.
+Die Marke kann aus mehreren Wörtern bestehen, das Modell ebenfalls; die
+Ausstattungslinie ist der Rest des Titels nach dem Modell bzw. die Version.
+
+*ModelIndex* baut aus den gecrawlten Daten einen Trie je Marke mit den
+bekannten Modellbezeichnungen auf (Token für Token, ohne Groß-/Kleinschreibung).
+Inserate ohne verwertbare Version werden per Longest-Prefix-Match gegen diesen
+Trie zugeordnet. Jedes verschiedene Paar aus Titel und Version wird nur einmal tokenisiert. Marke und
+Modell erhalten kompakte Integer-Codes (Marke_ID, Modell_ID), die beim
+Wiederverwenden eines gespeicherten Index stabil bleiben::
+
+    index = ModelIndex().fit(AutoDF)
+    AutoDF = index.transform(AutoDF)
+    AutoDF.groupby("Modell_ID", observed=True)["Preis"].median()
+"""
+
+import numpy as np
+import pandas as pd
+
+# Marken, deren Name aus mehreren Wörtern besteht bzw. nicht das erste Wort des Titels ist
+MULTIWORD_BRANDS = [
+    "Alfa Romeo", "Aston Martin", "DS Automobiles", "Land Rover", "Lynk & Co",
+    "Mercedes-Benz", "Rolls-Royce", "Mercedes-AMG",
+]
+
+# abweichende Schreibweisen -> kanonischer Markenname
+BRAND_ALIASES = {
+    "Mercedes Benz": "Mercedes-Benz",
+    "Rolls Royce": "Rolls-Royce",
+    "VW": "Volkswagen",
+}
+
+UNKNOWN = -1
+
+
+def _tokens(text):
+    return text.split() if isinstance(text, str) else []
+
+
+def _key(tokens):
+    return tuple(t.casefold() for t in tokens)
+
+
+class Trie:
+    """Trie über Token-Folgen mit Longest-Prefix-Match."""
+
+    def __init__(self):
+        self.root = {}
+
+    def insert(self, tokens, value):
+        node = self.root
+        for token in _key(tokens):
+            node = node.setdefault(token, {})
+        node[None] = value
+
+    def longestMatch(self, tokens, start=0):
+        """Gibt (Wert, Anzahl Token) des längsten Präfixes ab *start* zurück."""
+        node, match = self.root, (None, 0)
+        for i, token in enumerate(_key(tokens[start:]), start=1):
+            node = node.get(token)
+            if node is None:
+                break
+            if None in node:
+                match = (node[None], i)
+        return match
+
+
+BRANDS = Trie()
+for _brand in MULTIWORD_BRANDS:
+    BRANDS.insert(_brand.split(), _brand)
+for _alias, _brand in BRAND_ALIASES.items():
+    BRANDS.insert(_alias.split(), _brand)
+
+
+def _splitBrand(tokens):
+    """(Marke, Anzahl Token der Marke); ohne Treffer ist die Marke das erste Wort."""
+    brand, n = BRANDS.longestMatch(tokens)
+    if brand is None and tokens:
+        return tokens[0], 1
+    return brand, n
+
+
+def splitMarke(titles):
+    """Marke je Titel; jeder verschiedene Titel wird nur einmal zerlegt."""
+    codes, uniques = pd.factorize(titles)
+    brands = np.array([_splitBrand(_tokens(t))[0] for t in uniques] + [np.nan], dtype=object)
+    #Code -1 (fehlender Titel) zeigt auf das angehängte NaN
+    return pd.Series(brands[codes], index=titles.index, name="Marke")
+
+
+def _findVersion(tokens, n, versionTokens):
+    """Position der Version im Titel nach mindestens einem Modell-Token oder None."""
+    k = len(versionTokens)
+    if not k:
+        return None
+    keys, versionKey = _key(tokens), _key(versionTokens)
+    for start in range(len(tokens) - k, n, -1):
+        if keys[start:start + k] == versionKey:
+            return start
+    return None
+
+
+def _modelFromTitle(tokens, n, version):
+    """Modell = Titel ohne Marke und ohne die Version (falls sie im Titel steht)."""
+    return tokens[n:_findVersion(tokens, n, _tokens(version))]
+
+
+class ModelIndex:
+    """Index Marke -> Modell -> Ausstattungslinie mit stabilen Integer-Codes."""
+
+    def __init__(self):
+        self.models = {}
+        self.marken = []
+        self.modelle = []
+        self._markeCodes = {}
+        self._modellCodes = {}
+
+    def _markeCode(self, marke):
+        if marke not in self._markeCodes:
+            self._markeCodes[marke] = len(self.marken)
+            self.marken.append(marke)
+        return self._markeCodes[marke]
+
+    def _modellCode(self, marke, modell):
+        key = (marke, modell)
+        if key not in self._modellCodes:
+            self._modellCodes[key] = len(self.modelle)
+            self.modelle.append(key)
+        return self._modellCodes[key]
+
+    def fit(self, AutoDF):
+        """Lernt die Modellbezeichnungen je Marke aus Titel und Version."""
+        pairs = AutoDF[["Titel", "Version"]].astype(object).drop_duplicates()
+        spellings = {}
+        for titel, version in pairs.itertuples(index=False):
+            tokens = _tokens(titel)
+            marke, n = _splitBrand(tokens)
+            modell = _modelFromTitle(tokens, n, version)
+            if marke is None or not modell:
+                continue
+            counts = spellings.setdefault((marke, _key(modell)), {})
+            counts[" ".join(modell)] = counts.get(" ".join(modell), 0) + 1
+
+        #häufigste Schreibweise ist die kanonische Bezeichnung
+        for (marke, _), counts in sorted(spellings.items()):
+            modell = max(counts, key=counts.get)
+            self.models.setdefault(marke, Trie()).insert(modell.split(), modell)
+            self._modellCode(marke, modell)
+            self._markeCode(marke)
+        return self
+
+    def parse(self, titel, version=None):
+        """Zerlegt Titel und Version in (Marke, Modell, Ausstattungslinie)."""
+        tokens, versionTokens = _tokens(titel), _tokens(version)
+        marke, n = _splitBrand(tokens)
+        if marke is None:
+            return None, None, None
+        modell, m = self.models[marke].longestMatch(tokens, n) if marke in self.models else (None, 0)
+        if modell is None:
+            tokensModell = _modelFromTitle(tokens, n, version) or tokens[n:n + 1]
+            modell, m = (" ".join(tokensModell) or None), len(tokensModell)
+        #steht die Version nicht im Titel, gehört sie zur Ausstattungslinie
+        if _findVersion(tokens, n, versionTokens) is None:
+            trimTokens = tokens[n + m:] + versionTokens
+        else:
+            trimTokens = tokens[n + m:]
+        return marke, modell, " ".join(trimTokens) or None
+
+    def transform(self, AutoDF):
+        """Ergänzt Marke, Modell, Ausstattungslinie sowie Marke_ID und Modell_ID.
+
+        Unbekannte Marken und Modelle werden dem Index hinzugefügt, bestehende
+        Codes ändern sich dadurch nicht.
+        """
+        AutoDF = AutoDF.copy()
+        pairs = AutoDF[["Titel", "Version"]].astype(object).fillna("")
+        codes, uniques = pd.factorize(pd.MultiIndex.from_frame(pairs))
+
+        rows = []
+        for titel, version in uniques:
+            marke, modell, trim = self.parse(titel, version)
+            markeID = self._markeCode(marke) if marke is not None else UNKNOWN
+            modellID = self._modellCode(marke, modell) if modell is not None else UNKNOWN
+            rows.append((marke, modell, trim, markeID, modellID))
+        parsed = pd.DataFrame(rows, columns=["Marke", "Modell", "Ausstattungslinie", "Marke_ID", "Modell_ID"])
+        parsed = parsed.iloc[codes].reset_index(drop=True)
+        parsed.index = AutoDF.index
+
+        for col in ["Marke", "Modell", "Ausstattungslinie"]:
+            AutoDF[col] = parsed[col].astype("category")
+        AutoDF["Marke_ID"] = parsed["Marke_ID"].astype("int16")
+        AutoDF["Modell_ID"] = parsed["Modell_ID"].astype("int32")
+        return AutoDF
+
+    def markeName(self, code):
+        return self.marken[code] if code != UNKNOWN else None
+
+    def modellName(self, code):
+        return self.modelle[code] if code != UNKNOWN else None
+
+    def save(self, path):
+        pd.to_pickle({"models": self.models, "marken": self.marken, "modelle": self.modelle}, path)
+
+    @classmethod
+    def load(cls, path):
+        state = pd.read_pickle(path)
+        index = cls()
+        index.models = state["models"]
+        for marke in state["marken"]:
+            index._markeCode(marke)
+        for marke, modell in state["modelle"]:
+            index._modellCode(marke, modell)
+        return index
+
+
+def normalizeAutoDF(AutoDF, index=None):
+    """Normalisiert AutoDF mit *index* (bzw. einem aus AutoDF gelernten Index)."""
+    index = index or ModelIndex().fit(AutoDF)
+    return index.transform(AutoDF), index
@@ -0,0 +1,288 @@
+"""Analyse-Pipeline als DAG benannter Tasks mit Cache auf der Festplatte.
+
+Jeder Task (crawl, clean, filter, aggregate, geocode, model, plot_*) deklariert
+seine Vorgänger. Der Cache-Schlüssel eines Tasks setzt sich aus dem Quellcode
+der Task-Funktion und der von ihr verwendeten Funktionen, Klassen und Konstanten
+des eigenen Pakets (siehe *Task.code*), der unter *uses* angegebenen
+Module/Funktionen, den Parametern und den Inhalts-Hashes der Eingaben zusammen.
+Ändert sich eine Bereinigungsregel oder ein Plot, werden daher nur die
+betroffenen nachfolgenden Tasks neu berechnet. Liefert ein geänderter Task dasselbe Ergebnis wie vorher, bleiben
+auch die nachfolgenden Tasks im Cache gültig.
+
+Beispiel::
+
+    pipe = buildPipeline(fregList=range(2015, 2017), pages=2)
+    fig = pipe.run("plot_histogram")
+    figures = pipe.run("page")
+"""
+
+import hashlib
+import inspect
+import os
+import pickle
+import types
+
+import pandas as pd
+
+DEFAULT_CACHE_DIR = ".pipeline_cache"
+
+# Konstanten, deren repr stabil ist und daher in den Cache-Schlüssel eingeht
+CONSTANT_TYPES = (str, bytes, int, float, bool, type(None), tuple, list, dict, set, frozenset, range)
+
+
+def hashContent(obj):
+    """Inhalts-Hash eines Task-Ergebnisses."""
+    h = hashlib.sha256()
+    if isinstance(obj, pd.DataFrame):
+        h.update(pickle.dumps((list(obj.columns), [str(t) for t in obj.dtypes])))
+        h.update(pd.util.hash_pandas_object(obj, index=True).values.tobytes())
+    elif isinstance(obj, pd.Series):
+        h.update(pickle.dumps((obj.name, str(obj.dtype))))
+        h.update(pd.util.hash_pandas_object(obj, index=True).values.tobytes())
+    elif isinstance(obj, dict):
+        for key in sorted(obj):
+            h.update(str(key).encode())
+            h.update(hashContent(obj[key]).encode())
+    else:
+        h.update(pickle.dumps(obj))
+    return h.hexdigest()
+
+
+def _source(obj):
+    try:
+        return inspect.getsource(obj)
+    except (OSError, TypeError):
+        return repr(obj)
+
+
+def _package(obj):
+    name = obj.__name__ if inspect.ismodule(obj) else getattr(obj, "__module__", None)
+    return name.split(".")[0] if isinstance(name, str) else None
+
+
+def _codeNames(code):
+    """Namen, die ein Code-Objekt samt verschachtelter Funktionen nachschlägt."""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _codeNames(const)
+    return names
+
+
+def _references(func):
+    """Objekte, auf die *func* über globale Namen, Closures und Default-Werte zugreift.
+
+    Greift die Funktion über ein Modul des eigenen Pakets zu (viz.preisHistogram),
+    wird das Attribut des Moduls aufgelöst, nicht das ganze Modul. Aus Closures
+    werden nur Module, Funktionen und Klassen übernommen; dort liegende Daten
+    (z.B. eine Liste, an die der Task anhängt) würden den Schlüssel verändern.
+    """
+    names = sorted(_codeNames(func.__code__))
+    scope = [func.__globals__[name] for name in names if name in func.__globals__]
+    for cell in func.__closure__ or ():
+        try:
+            obj = cell.cell_contents
+        except ValueError:
+            continue
+        if isinstance(obj, (types.ModuleType, types.FunctionType, type)):
+            scope.append(obj)
+    scope += list(func.__defaults__ or ()) + list((func.__kwdefaults__ or {}).values())
+    package = _package(func)
+    objects = []
+    for obj in scope:
+        if inspect.ismodule(obj):
+            if _package(obj) == package:
+                objects += [getattr(obj, name) for name in names if hasattr(obj, name)]
+        else:
+            objects.append(obj)
+    return objects
+
+
+class Task:
+    def __init__(self, name, func, deps=(), uses=(), params=None):
+        self.name = name
+        self.func = func
+        self.deps = list(deps)
+        self.uses = list(uses)
+        self.params = params or {}
+
+    def code(self):
+        """Quellcode-Objekte des Tasks: die Funktion, was sie verwendet, und *uses*.
+
+        Ausgehend von der Task-Funktion werden die verwendeten Funktionen und
+        Klassen des eigenen Pakets rekursiv verfolgt; Konstanten (CONSTANT_TYPES)
+        gehen mit ihrem repr ein. Funktionen anderer Pakete (pandas, plotly, ...)
+        werden nicht verfolgt. Ändert sich eine Plot-Funktion in viz, bleiben die
+        übrigen Plot-Tasks daher im Cache gültig.
+        """
+        package = _package(self.func)
+        objects, pending = [], [self.func]
+        while pending:
+            obj = pending.pop(0)
+            if any(obj is seen for seen in objects):
+                continue
+            if isinstance(obj, (types.FunctionType, type)):
+                if obj is not self.func and _package(obj) != package:
+                    continue
+                objects.append(obj)
+                if isinstance(obj, type):
+                    pending += [member for member in vars(obj).values() if isinstance(member, types.FunctionType)]
+                else:
+                    pending += _references(obj)
+            elif isinstance(obj, CONSTANT_TYPES):
+                objects.append(obj)
+        for obj in self.uses:
+            if not any(obj is seen for seen in objects):
+                objects.append(obj)
+        return objects
+
+    def key(self, inputHashes):
+        """Cache-Schlüssel aus Code, Parametern und Inhalts-Hashes der Eingaben."""
+        h = hashlib.sha256()
+        for obj in self.code():
+            h.update(_source(obj).encode())
+        h.update(repr(sorted(self.params.items())).encode())
+        for inputHash in inputHashes:
+            h.update(inputHash.encode())
+        return h.hexdigest()[:20]
+
+
+class Pipeline:
+    def __init__(self, cacheDir=DEFAULT_CACHE_DIR, verbose=True):
+        self.cacheDir = cacheDir
+        self.verbose = verbose
+        self.tasks = {}
+
+    def add(self, name, func, deps=(), uses=(), **params):
+        for dep in deps:
+            if dep not in self.tasks:
+                raise KeyError("Task %r hängt von unbekanntem Task %r ab" % (name, dep))
+        self.tasks[name] = Task(name, func, deps, uses, params)
+        return func
+
+    def task(self, name=None, deps=(), uses=(), **params):
+        """Decorator zum Registrieren einer Funktion als Task."""
+        def decorator(func):
+            return self.add(name or func.__name__, func, deps, uses, **params)
+        return decorator
+
+    def downstream(self, name):
+        """Alle Tasks, die direkt oder indirekt von *name* abhängen."""
+        result = []
+        for task in self.tasks.values():
+            if name in task.deps or any(dep in result for dep in task.deps):
+                result.append(task.name)
+        return result
+
+    def _paths(self, name, key):
+        base = os.path.join(self.cacheDir, name, key)
+        return base + ".pkl", base + ".hash"
+
+    def _log(self, msg):
+        if self.verbose:
+            print(msg)
+
+    def _resolve(self, name, state, force):
+        """Gibt (Inhalts-Hash, Loader) eines Tasks zurück, berechnet ihn nur bei Bedarf."""
+        if name in state:
+            return state[name]
+        task = self.tasks[name]
+        inputs = [self._resolve(dep, state, force) for dep in task.deps]
+        key = task.key([inputHash for inputHash, _ in inputs])
+        pklPath, hashPath = self._paths(name, key)
+
+        if name not in force and os.path.exists(pklPath) and os.path.exists(hashPath):
+            self._log("%-20s cached (%s)" % (name, key))
+            with open(hashPath) as f:
+                contentHash = f.read().strip()
+
+            def load(pklPath=pklPath):
+                with open(pklPath, "rb") as f:
+                    return pickle.load(f)
+        else:
+            self._log("%-20s run    (%s)" % (name, key))
+            output = task.func(*[loader() for _, loader in inputs], **task.params)
+            contentHash = hashContent(output)
+            os.makedirs(os.path.dirname(pklPath), exist_ok=True)
+            with open(pklPath, "wb") as f:
+                pickle.dump(output, f)
+            with open(hashPath, "w") as f:
+                f.write(contentHash)
+
+            def load(output=output):
+                return output
+
+        state[name] = (contentHash, load)
+        return state[name]
+
+    def run(self, *targets, force=()):
+        """Führt die Ziel-Tasks samt Vorgängern aus.
+
+        Bei einem Ziel wird dessen Ergebnis zurückgegeben, sonst ein Dictionary
+        Task-Name -> Ergebnis. Tasks in *force* werden ohne Cache neu berechnet.
+        """
+        targets = targets or tuple(self.tasks)
+        state = {}
+        results = {name: self._resolve(name, state, set(force))[1]() for name in targets}
+        return results[targets[0]] if len(targets) == 1 else results
+
+
+def buildPipeline(fregList=range(1990, 2022), pages=20, geoSample=100, cacheDir=DEFAULT_CACHE_DIR, verbose=True,
+                  snapshotFile=None, lightweight=False, pageBudget=None):
+    """Pipeline mit allen Schritten des Projekt-Notebooks.
+
+    Mit *snapshotFile* (oder AUTOSCOUT24_SNAPSHOT) wird AutoDFraw offline aus
+    einem Snapshot geladen statt gecrawlt. Mit *lightweight* werden die Plots
+    voraggregiert (siehe viz.setLightweightMode). Der Task "page" liefert alle
+    Plots für die Buchseite; Grafiken über dem Größenbudget *pageBudget* (Bytes,
+    im Lightweight-Modus standardmäßig viz.PAGE_BUDGET_BYTES) werden als PNG
+    gerendert.
+    """
+    #Teilsysteme erst hier laden, damit "import autoscout24.pipeline" leichtgewichtig bleibt
+    from . import aggregate, clean, crawl, geo, model, normalize, snapshot, validate, viz
+
+    pipe = Pipeline(cacheDir, verbose)
+
+    snapshotFile = snapshotFile or snapshot.snapshotPath()
+    if snapshotFile:
+        pipe.add("crawl", snapshot.loadSnapshot, path=snapshotFile, sha256=snapshot.fileHash(snapshotFile))
+    else:
+        pipe.add("crawl", crawl.crawlAutoDFraw, uses=[crawl], fregList=list(fregList), pages=pages)
+    pipe.add("clean", clean.transformRaw, deps=["crawl"], uses=[normalize])
+    pipe.add("filter", clean.filterAutoDF, deps=["clean"], uses=[validate])
+    pipe.add("aggregate", aggregate.aggregateAutoDF, deps=["filter"], uses=[aggregate])
+
+    @pipe.task("geocode", deps=["filter"], uses=[geo], n=geoSample)
+    def geocode(AutoDF, n):
+        AutoDFsmall = AutoDF[0:n]
+        return geo.joinGeoDF(AutoDFsmall, geo.geocodeCities(AutoDFsmall))
+
+    pipe.add("model", model.fitPriceModel, deps=["filter"], uses=[model], formula=model.PRICE_FORMULA)
+
+    pipe.add("plot_histogram", viz.preisHistogram, deps=["filter"], lightweight=lightweight)
+    pipe.add("plot_erstzulassung", viz.preisBoxByErstzulassung, deps=["filter"], lightweight=lightweight)
+    pipe.add("plot_scatter_ps", viz.preisScatterPS, deps=["filter"], lightweight=lightweight)
+    pipe.add("plot_distplot_getriebe", viz.preisDistplotGetriebe, deps=["filter"], lightweight=lightweight)
+
+    @pipe.task("plot_box_marke", deps=["filter", "aggregate"], lightweight=lightweight)
+    def plotBoxMarke(AutoDF, aggregates, lightweight):
+        return viz.preisBoxByMarke(AutoDF, aggregates["sorted_nb"], lightweight=lightweight)
+
+    @pipe.task("plot_bar_kraftstoff", deps=["aggregate"])
+    def plotBarKraftstoff(aggregates):
+        return viz.preisBarByKraftstoff(aggregates["PriceAveragePerKraftstoff"])
+
+    @pipe.task("plot_verbrauch_marke", deps=["aggregate"])
+    def plotVerbrauchMarke(aggregates):
+        return viz.verbrauchBarByMarke(aggregates["MarkenGruppiert"])
+
+    plots = [name for name in pipe.tasks if name.startswith("plot_")]
+    if pageBudget is None and lightweight:
+        pageBudget = viz.PAGE_BUDGET_BYTES
+
+    @pipe.task("page", deps=plots, maxBytes=pageBudget)
+    def page(*figures, maxBytes):
+        budget = viz.PageBudget(maxBytes)
+        return {name: budget.show(fig) for name, fig in zip(plots, figures)}
+
+    return pipe
@@ -0,0 +1,196 @@
+"""SQL-Abfragen über die gespeicherten Inserate mit DuckDB.
+
+*QueryEngine* registriert die Roh- und bereinigten Daten als Views in einer
+eingebetteten DuckDB-Datenbank, entweder aus Parquet-Dateien (z.B. der Senke
+``parquet:DIR`` des CLI oder der Preishistorie) oder direkt aus den
+postgreSQL-Tabellen ``autoscout24cars`` / ``autoscout24cars-cleaned``. DuckDB
+liest dabei nur die benötigten Spalten. Mit *memoryLimit* und *tempDirectory*
+werden Gruppierungen über Datensätze, die größer als der Arbeitsspeicher sind,
+auf die Festplatte ausgelagert.
+
+Die Auswertungen des Notebooks stehen als parametrisierte Abfragen bereit::
+
+    engine = QueryEngine(memoryLimit="2GB")
+    engine.registerParquetDir("out")
+    engine.preisNach("Kraftstoff", jahrVon=2015)
+    engine.correlation()
+
+Die vorgefertigten Abfragen benötigen die Spalten der bereinigten Tabelle
+(QUERY_COLUMNS); fehlen sie, z.B. bei der Rohtabelle oder der Gruppierung nach
+Modell ohne Normalisierung, wird ein ValueError mit den fehlenden Spalten
+ausgelöst.
+"""
+
+import os
+import re
+
+from .storage import CLEANED_TABLE, RAW_TABLE
+
+NUMERIC_COLUMNS = ["Preis", "km", "PS", "Erstzulassung", "Verbrauch_l_pro_100km", "Emissionen_g_pro_km"]
+
+# erlaubte Gruppierungsspalten (Spaltennamen können nicht als Parameter übergeben werden)
+GROUP_COLUMNS = ["Marke", "Modell", "Kraftstoff", "Getriebe", "Erstzulassung", "Stadt"]
+
+# Speicherangaben, die DuckDB für memory_limit akzeptiert, z.B. "2GB" oder "512MiB"
+_MEMORY_LIMIT = re.compile(r"^\d+(\.\d+)?\s*(B|KB|MB|GB|TB|KiB|MiB|GiB|TiB)$", re.IGNORECASE)
+
+# Filter der vorgefertigten Abfragen; ein Parameter mit Wert None filtert nicht
+_FILTER = """
+    WHERE ($marke::VARCHAR IS NULL OR Marke = $marke)
+      AND ($kraftstoff::VARCHAR IS NULL OR Kraftstoff = $kraftstoff)
+      AND ($getriebe::VARCHAR IS NULL OR Getriebe = $getriebe)
+      AND ($jahrVon::INTEGER IS NULL OR Erstzulassung >= $jahrVon)
+      AND ($jahrBis::INTEGER IS NULL OR Erstzulassung <= $jahrBis)
+"""
+
+QUERIES = {
+    "preis_nach": """
+        SELECT {group}, count(*) AS Anzahl, avg(Preis) AS Preis_Mittel, median(Preis) AS Preis_Median,
+               quantile_cont(Preis, 0.25) AS Preis_Q1, quantile_cont(Preis, 0.75) AS Preis_Q3,
+               avg(PS) AS PS_Mittel, avg(km) AS km_Mittel, avg(Verbrauch_l_pro_100km) AS Verbrauch_Mittel
+        FROM {table}""" + _FILTER + """
+        GROUP BY {group}
+        ORDER BY Preis_Median
+    """,
+    "verbrauch_nach_marke": """
+        SELECT Marke, avg(Verbrauch_l_pro_100km) AS Verbrauch_l_pro_100km, avg(Emissionen_g_pro_km) AS Emissionen_g_pro_km
+        FROM {table}""" + _FILTER + """
+        GROUP BY Marke
+        ORDER BY Verbrauch_l_pro_100km
+    """,
+    "preis_histogramm": """
+        SELECT floor(Preis / $binSize) * $binSize AS Preis_von, count(*) AS Anzahl
+        FROM {table}""" + _FILTER + """
+        GROUP BY Preis_von
+        ORDER BY Preis_von
+    """,
+}
+
+# Spalten, die die Tabelle einer vorgefertigten Abfrage enthalten muss (zusätzlich zur Gruppierung)
+FILTER_COLUMNS = ["Marke", "Kraftstoff", "Getriebe", "Erstzulassung"]
+QUERY_COLUMNS = {
+    "preis_nach": FILTER_COLUMNS + ["Preis", "PS", "km", "Verbrauch_l_pro_100km"],
+    "verbrauch_nach_marke": FILTER_COLUMNS + ["Verbrauch_l_pro_100km", "Emissionen_g_pro_km"],
+    "preis_histogramm": FILTER_COLUMNS + ["Preis"],
+}
+
+
+def _quote(name):
+    return '"%s"' % name.replace('"', '""')
+
+
+def _settings(memoryLimit=None, tempDirectory=None, threads=None):
+    """Geprüfte DuckDB-Einstellungen für duckdb.connect(config=...)."""
+    config = {}
+    if memoryLimit:
+        if not _MEMORY_LIMIT.match(str(memoryLimit)):
+            raise ValueError("ungültiges memoryLimit %r, erwartet z.B. '2GB' oder '512MiB'" % (memoryLimit,))
+        config["memory_limit"] = str(memoryLimit)
+    if tempDirectory:
+        config["temp_directory"] = os.fspath(tempDirectory)
+    if threads:
+        if not isinstance(threads, int) or threads < 1:
+            raise ValueError("threads muss eine positive ganze Zahl sein, nicht %r" % (threads,))
+        config["threads"] = int(threads)
+    return config
+
+
+def _filterParams(marke=None, kraftstoff=None, getriebe=None, jahrVon=None, jahrBis=None):
+    return {"marke": marke, "kraftstoff": kraftstoff, "getriebe": getriebe, "jahrVon": jahrVon, "jahrBis": jahrBis}
+
+
+class QueryEngine:
+    """Eingebettete DuckDB-Datenbank mit den Inseraten als Views."""
+
+    def __init__(self, database=":memory:", memoryLimit=None, tempDirectory=None, threads=None):
+        import duckdb
+
+        #Einstellungen als Konfiguration statt als SQL-Text übergeben
+        self.con = duckdb.connect(database, config=_settings(memoryLimit, tempDirectory, threads))
+        self.tables = []
+
+    def registerParquet(self, name, path, hivePartitioning=False):
+        """Registriert eine Parquet-Datei (oder ein Glob-Muster) als View *name*."""
+        #Views können keine Parameter enthalten, der Pfad wird daher als Literal eingesetzt
+        self.con.execute("CREATE OR REPLACE VIEW %s AS SELECT * FROM read_parquet('%s', hive_partitioning = %s)"
+                         % (_quote(name), path.replace("'", "''"), str(hivePartitioning).lower()))
+        if name not in self.tables:
+            self.tables.append(name)
+        return name
+
+    def registerParquetDir(self, directory):
+        """Registriert die Tabellen, die das CLI mit --sink parquet:DIR geschrieben hat."""
+        registered = []
+        for name in [RAW_TABLE, CLEANED_TABLE]:
+            path = os.path.join(directory, name + ".parquet")
+            if os.path.exists(path):
+                registered.append(self.registerParquet(name, path))
+        return registered
+
+    def registerHistory(self, root):
+        """Registriert die Preishistorie (siehe history.PriceHistory) als View ``price_history``."""
+        return self.registerParquet("price_history", os.path.join(root, "crawl_date=*", "*.parquet"),
+                                    hivePartitioning=True)
+
+    def registerPostgres(self, conf, tables=(RAW_TABLE, CLEANED_TABLE)):
+        """Bindet die postgreSQL-Datenbank schreibgeschützt ein und registriert *tables* als Views."""
+        self.con.execute("INSTALL postgres")
+        self.con.execute("LOAD postgres")
+        dsn = "dbname=%s user=%s password=%s host=%s port=%s" % (
+            conf["database"], conf["user"], conf["passw"], conf.get("host", "localhost"), conf.get("port", "5432"))
+        self.con.execute("ATTACH '%s' AS pg (TYPE postgres, READ_ONLY)" % dsn.replace("'", "''"))
+        for name in tables:
+            self.con.execute("CREATE OR REPLACE VIEW %s AS SELECT * FROM pg.public.%s" % (_quote(name), _quote(name)))
+            if name not in self.tables:
+                self.tables.append(name)
+        return list(tables)
+
+    def columns(self, table):
+        """Spaltennamen der Tabelle bzw. View *table*."""
+        return [col[0] for col in self.con.execute("SELECT * FROM %s LIMIT 0" % _quote(table)).description]
+
+    def requireColumns(self, table, columns):
+        """Löst einen ValueError aus, wenn *table* eine der *columns* nicht enthält."""
+        missing = [col for col in dict.fromkeys(columns) if col not in self.columns(table)]
+        if missing:
+            raise ValueError("Tabelle %r enthält die Spalten %s nicht; die vorgefertigten Abfragen benötigen die "
+                             "bereinigte Tabelle (z.B. %r)" % (table, ", ".join(missing), CLEANED_TABLE))
+
+    def sql(self, query, params=None):
+        """Führt eine beliebige Abfrage aus und gibt ein Dataframe zurück."""
+        return self.con.execute(query, params or {}).df()
+
+    def query(self, name, table=CLEANED_TABLE, group=None, **params):
+        """Führt die vorgefertigte Abfrage *name* aus QUERIES aus."""
+        if group is not None and group not in GROUP_COLUMNS:
+            raise ValueError("Gruppierung nach %r nicht erlaubt, möglich sind %s" % (group, GROUP_COLUMNS))
+        self.requireColumns(table, QUERY_COLUMNS[name] + ([group] if group else []))
+        text = QUERIES[name].format(table=_quote(table), group=_quote(group) if group else None)
+        return self.sql(text, params)
+
+    def preisNach(self, group="Marke", table=CLEANED_TABLE, **filters):
+        """Preisstatistik je Marke, Kraftstoff, Getriebe, ... (vgl. aggregate.medianByMarke)."""
+        return self.query("preis_nach", table, group=group, **_filterParams(**filters)).set_index(group)
+
+    def verbrauchNachMarke(self, table=CLEANED_TABLE, **filters):
+        """Durchschnittlicher Verbrauch und Emissionen je Marke (vgl. aggregate.meanByMarke)."""
+        return self.query("verbrauch_nach_marke", table, **_filterParams(**filters)).set_index("Marke")
+
+    def preisHistogramm(self, binSize=1000, table=CLEANED_TABLE, **filters):
+        return self.query("preis_histogramm", table, binSize=binSize, **_filterParams(**filters))
+
+    def correlation(self, columns=NUMERIC_COLUMNS, table=CLEANED_TABLE, **filters):
+        """Korrelationsmatrix der numerischen Spalten in einem Durchlauf (vgl. aggregate.correlation)."""
+        import pandas as pd
+
+        self.requireColumns(table, FILTER_COLUMNS + list(columns))
+        pairs = [(a, b) for i, a in enumerate(columns) for b in columns[i + 1:]]
+        select = ", ".join("corr(%s, %s)" % (_quote(a), _quote(b)) for a, b in pairs)
+        row = self.sql("SELECT %s FROM %s %s" % (select, _quote(table), _FILTER), _filterParams(**filters)).iloc[0]
+        matrix = pd.DataFrame(1.0, index=list(columns), columns=list(columns))
+        for (a, b), value in zip(pairs, row):
+            matrix.loc[a, b] = matrix.loc[b, a] = value
+        return matrix
+
+    def close(self):
+        self.con.close()
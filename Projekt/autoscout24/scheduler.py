@@ -0,0 +1,48 @@
+"""Einfacher Worker-Scheduler für unabhängige Pipeline-Schritte.
+
+*runStage* verteilt die Jobs einer Stage (z.B. ein Crawl je Erstzulassungsjahr)
+auf einen Thread- oder Prozesspool und sammelt Ergebnisse, Fehler und Dauer.
+Fehlgeschlagene Jobs brechen die Stage nicht ab, sondern werden gezählt.
+"""
+
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+
+class StageResult:
+    def __init__(self, name):
+        self.name = name
+        self.results = {}
+        self.errors = {}
+        self.seconds = 0.0
+
+    def stats(self):
+        return {"jobs": len(self.results) + len(self.errors), "failed": len(self.errors),
+                "seconds": round(self.seconds, 3),
+                "errors": {str(job): error for job, error in self.errors.items()}}
+
+
+def runStage(name, func, jobs, workers=4, processes=False):
+    """Führt func(job) für alle *jobs* parallel aus.
+
+    *jobs* ist eine Liste oder ein Dictionary Schlüssel -> Argument (wenn das
+    Argument, z.B. ein Dataframe, selbst kein Schlüssel sein kann).
+
+    Mit processes=True wird ein Prozesspool verwendet (für CPU-lastige Schritte
+    wie die Bereinigung), sonst ein Threadpool (für I/O wie Crawl und Storage).
+    """
+    if not isinstance(jobs, dict):
+        jobs = {job: job for job in jobs}
+    stage = StageResult(name)
+    start = time.perf_counter()
+    executorClass = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    with executorClass(max_workers=max(1, workers)) as executor:
+        futures = {executor.submit(func, arg): job for job, arg in jobs.items()}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                stage.results[job] = future.result()
+            except Exception as e:
+                stage.errors[job] = "%s: %s" % (type(e).__name__, e)
+    stage.seconds = time.perf_counter() - start
+    return stage
@@ -0,0 +1,49 @@
+"""Eingefrorener Datenstand (Snapshot) der gecrawlten Rohdaten.
+
+Für den Build des Jupyter Books soll nicht jedes Mal gecrawlt, aus postgreSQL
+gelesen oder geokodiert werden. Stattdessen wird AutoDFraw einmal als Snapshot
+gespeichert und beim Build offline daraus geladen. Neben Pickle-Snapshots wird
+auch das Excel-Backup *AutoDF_vor_Replace.xlsx* unterstützt.
+
+Ist die Umgebungsvariable AUTOSCOUT24_SNAPSHOT gesetzt, verwendet
+*pipeline.buildPipeline* diesen Snapshot anstelle des Crawls.
+"""
+
+import hashlib
+import os
+
+import pandas as pd
+
+SNAPSHOT_ENV = "AUTOSCOUT24_SNAPSHOT"
+DEFAULT_SNAPSHOT = "AutoDFraw_snapshot.pkl"
+EXCEL_BACKUP = "AutoDF_vor_Replace.xlsx"
+
+
+def snapshotPath():
+    """Pfad des Snapshots aus der Umgebung oder None (= online crawlen)."""
+    return os.environ.get(SNAPSHOT_ENV) or None
+
+
+def fileHash(path):
+    """Inhalts-Hash einer Datei, damit ein geänderter Snapshot den Cache invalidiert."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def freezeSnapshot(AutoDFraw, path=DEFAULT_SNAPSHOT):
+    """Speichert AutoDFraw als Snapshot und gibt dessen Inhalts-Hash zurück."""
+    AutoDFraw.to_pickle(path)
+    return fileHash(path)
+
+
+def loadSnapshot(path=DEFAULT_SNAPSHOT, sha256=None):
+    """Lädt AutoDFraw aus einem Pickle-Snapshot oder dem Excel-Backup.
+
+    *sha256* wird nur als Cache-Parameter der Pipeline verwendet.
+    """
+    if path.endswith((".xlsx", ".xls")):
+        return pd.read_excel(path, index_col=0)
+    return pd.read_pickle(path)
@@ -0,0 +1,47 @@
+"""Speicherung der Dataframes in postgreSQL."""
+
+import json
+
+from .metrics import METRICS
+
+RAW_TABLE = "autoscout24cars"
+CLEANED_TABLE = "autoscout24cars-cleaned"
+QUARANTINE_TABLE = "autoscout24cars-quarantine"
+
+
+def loadConfig(path='configLocalDS.json'):
+    """Liest die Datenbank-Parameter (database, user, passw, host, port)."""
+    with open(path) as f:
+        return json.load(f)
+
+
+def createEngine(conf=None):
+    from sqlalchemy import create_engine
+
+    conf = conf or loadConfig()
+    conn_str = 'postgresql://%s:%s@%s:%s/%s' % (conf["user"], conf["passw"], conf.get("host", "localhost"),
+                                                conf.get("port", "5432"), conf["database"])
+    return create_engine(conn_str)
+
+
+def hasTable(engine, name):
+    from sqlalchemy import inspect
+
+    return inspect(engine).has_table(name)
+
+
+def writeTable(df, name, engine):
+    """Speichert *df* in Tabelle *name*, sofern die Tabelle noch nicht vorhanden ist."""
+    if hasTable(engine, name):
+        print("table already exists")
+        return False
+    with METRICS.timer("to_sql_seconds", table=name):
+        df.to_sql(name=name, index=True, index_label='index', con=engine)
+    METRICS.inc("rows_written_total", len(df), table=name)
+    return True
+
+
+def readTable(name, engine):
+    import pandas as pd
+
+    return pd.read_sql_query('SELECT * FROM "%s"' % name, engine, index_col="index")
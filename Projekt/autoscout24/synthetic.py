@@ -0,0 +1,211 @@
+"""Synthetische Inserate für Lasttests mit dem 100- bis 1000-fachen Crawl-Umfang.
+
+*ListingModel* lernt die gemeinsame Verteilung von Marke, Kraftstoff, Getriebe,
+PS, km, Erstzulassung, Preis, Verbrauch und Emissionen aus dem bereinigten
+AutoDF. Beim Sampling wird ein echtes Fahrzeug gezogen (alle kategorialen
+Merkmale und Texte bleiben dadurch konsistent) und dessen numerische Werte mit
+einem Gauß-Kernel je Marke verrauscht (Smoothed Bootstrap bzw. KDE). Alle
+Schritte sind vektorisiert, sodass auch Millionen Inserate schnell erzeugt
+werden.
+
+Die Stichprobe kann als Rohdaten-Dataframe im Format von AutoDFraw
+(*toRawFrame*) oder als HTML-Suchergebnisseiten im Markup von Autoscout24
+(*iterHTMLPages*) ausgegeben werden und durchläuft damit jede Stage der
+Pipeline::
+
+    python -m autoscout24.synthetic AutoDF_vor_Replace.xlsx --rows 1000000 --out AutoDFraw_1m.pkl
+"""
+
+import argparse
+import html
+import os
+from urllib.parse import urljoin
+
+import numpy as np
+import pandas as pd
+
+NUMERIC_COLUMNS = ["PS", "km", "Erstzulassung", "Preis", "Verbrauch_l_pro_100km", "Emissionen_g_pro_km"]
+CATEGORY_COLUMNS = ["Marke", "Kraftstoff", "Getriebe"]
+TEXT_COLUMNS = ["Titel", "Version", "Untertitel", "Stadt"]
+
+# Rundung der erzeugten Werte, damit sie wie echte Angaben aussehen
+ROUNDING = {"PS": 1, "km": 100, "Erstzulassung": 1, "Preis": 10, "Verbrauch_l_pro_100km": 0.1, "Emissionen_g_pro_km": 1}
+
+PAGE_SIZE = 20
+
+
+class ListingModel:
+    """Gemeinsame Verteilung der Fahrzeugmerkmale, gelernt aus dem bereinigten AutoDF."""
+
+    def __init__(self, AutoDF):
+        columns = [c for c in CATEGORY_COLUMNS + TEXT_COLUMNS if c in AutoDF.columns]
+        self.source = AutoDF[columns + NUMERIC_COLUMNS].reset_index(drop=True)
+        for col in CATEGORY_COLUMNS:
+            self.source[col] = self.source[col].astype(object)
+        values = self.source[NUMERIC_COLUMNS].astype(float)
+
+        # Bandbreite je Marke nach der Faustregel von Silverman; Marken mit nur
+        # einem Fahrzeug erhalten die Bandbreite des gesamten Datensatzes
+        grouped = values.groupby(self.source["Marke"])
+        bandwidth = 1.06 * grouped.transform("std").mul(grouped.transform("size").pow(-0.2), axis=0)
+        self.bandwidth = bandwidth.fillna(1.06 * values.std() * len(values) ** -0.2).to_numpy()
+        self.values = values.to_numpy()
+        self.minimum = values.min().to_numpy()
+        self.maximum = values.max().to_numpy()
+
+    def sample(self, n, seed=None):
+        """Erzeugt *n* synthetische Fahrzeuge im Format des bereinigten AutoDF."""
+        rng = np.random.default_rng(seed)
+        rows = rng.integers(0, len(self.source), n)
+        noise = rng.standard_normal((n, len(NUMERIC_COLUMNS))) * self.bandwidth[rows]
+        values = np.clip(self.values[rows] + noise, self.minimum, self.maximum)
+
+        sampleDF = self.source.iloc[rows].drop(columns=NUMERIC_COLUMNS).reset_index(drop=True)
+        for i, col in enumerate(NUMERIC_COLUMNS):
+            step = ROUNDING[col]
+            column = np.round(values[:, i] / step) * step
+            sampleDF[col] = column.round(1) if step < 1 else column.astype("int64")
+
+        # Elektroautos haben weiterhin keinen Verbrauch und keine Emissionen
+        elektro = (sampleDF["Kraftstoff"] == "Elektro").to_numpy()
+        sampleDF.loc[elektro, ["Verbrauch_l_pro_100km", "Emissionen_g_pro_km"]] = 0
+        return sampleDF
+
+
+def _listingID(i):
+    return "synthetic-%08x" % i
+
+
+def _thousands(values):
+    return ["{:,}".format(int(v)).replace(",", ".") for v in values]
+
+
+def toRawFrame(sampleDF, leasingShare=0.02, missingShare=0.05, seed=None):
+    """Formatiert eine Stichprobe als Rohdaten wie von *extractPageCarDF* geliefert.
+
+    *leasingShare* Inserate werden als Leasing-Angebote und *missingShare* mit
+    fehlenden Angaben ausgegeben, damit die Bereinigungsregeln greifen. ID und
+    Link entsprechen denen der Seiten aus *iterHTMLPages*.
+    """
+    #crawl erst hier laden, damit das Erzeugen der Stichprobe ohne requests/bs4 auskommt
+    from .crawl import HOST
+
+    rng = np.random.default_rng(seed)
+    n = len(sampleDF)
+    leasing = rng.random(n) < leasingShare
+    missing = rng.random(n) < missingShare
+
+    preis = np.array(["€ %s,-" % p for p in _thousands(sampleDF["Preis"])], dtype=object)
+    preis[leasing] = ["€ %s,- mtl." % p for p in _thousands(sampleDF["Preis"][leasing] // 100)]
+    ps = sampleDF["PS"].to_numpy()
+    verbrauch = np.array(["%s l/100 km (komb.)" % ("%.1f" % v).replace(".", ",")
+                          for v in sampleDF["Verbrauch_l_pro_100km"]], dtype=object)
+    verbrauch[(sampleDF["Verbrauch_l_pro_100km"] == 0).to_numpy() | missing] = "- (l/100 km)"
+    halter = rng.integers(1, 4, n)
+
+    ids = [_listingID(i) for i in range(n)]
+    return pd.DataFrame({
+        "ID": ids,
+        "Link": [urljoin(HOST, "/angebote/" + listingID) for listingID in ids],
+        "Titel": sampleDF["Titel"].to_numpy(),
+        "Version": sampleDF["Version"].to_numpy(),
+        "Untertitel": sampleDF["Untertitel"].to_numpy(),
+        "Preis": preis,
+        "Leasing": leasing,
+        "Standort": ["DE-%05d %s" % (plz, stadt) for plz, stadt in zip(rng.integers(1000, 99999, n), sampleDF["Stadt"])],
+        "km": ["%s km" % km for km in _thousands(sampleDF["km"])],
+        "Erstzulassung": ["%02d/%d" % (m, y) for m, y in zip(rng.integers(1, 13, n), sampleDF["Erstzulassung"])],
+        "PS": ["%d kW (%d PS)" % (round(p * 0.7355), p) for p in ps],
+        "Zustand": "Gebraucht",
+        "Fahrzeughalter": np.where(rng.random(n) < 0.3, "- (Fahrzeughalter)",
+                                   np.char.add(halter.astype(str), " Fahrzeughalter")),
+        "Getriebe": sampleDF["Getriebe"].to_numpy(),
+        "Kraftstoff": sampleDF["Kraftstoff"].to_numpy(),
+        "Verbrauch_l_pro_100km": verbrauch,
+        "Emissionen_g_pro_km": np.where(sampleDF["Emissionen_g_pro_km"].to_numpy() == 0, "- (g/km)",
+                                        np.char.add(sampleDF["Emissionen_g_pro_km"].to_numpy().astype(str), " g/km (komb.)")),
+    })
+
+
+def _articleHTML(i, car):
+    def e(value):
+        return "" if pd.isna(value) else html.escape(str(value))
+
+    listingID = getattr(car, "ID", None)
+    listingID = _listingID(i) if pd.isna(listingID) else str(listingID)
+    #der Titel enthält die Version bereits, da sie im h2-Element steht
+    title = str(car.Titel)
+    if isinstance(car.Version, str) and title.endswith(" " + car.Version):
+        title = title[:-len(car.Version) - 1]
+    subtitle = "" if pd.isna(car.Untertitel) else '<span class="ListItem_subtitle__VEw08">%s</span>' % e(car.Untertitel)
+    if car.Leasing:
+        price = '<div class="LeasingPrice_container__k1sq2"><span class="LeasingPrice_price__Z1X1g">%s</span></div>' % e(car.Preis)
+    else:
+        price = '<div class="ListItem_pricerow__cR9wO"><p class="Price_price__WZayw">%s</p></div>' % e(car.Preis)
+    details = "".join('<span class="VehicleDetailTable_item__koEV4">%s</span>' % e(getattr(car, col))
+                      for col in ["km", "Erstzulassung", "PS", "Zustand", "Fahrzeughalter", "Getriebe",
+                                  "Kraftstoff", "Verbrauch_l_pro_100km", "Emissionen_g_pro_km"])
+    extra = ""
+    if car.Leasing:
+        extra = ('<div class="VehicleDetailTable_container__mUUbY"><span>48 Monate</span>'
+                 '<span>10.000 km/Jahr</span><span>€ 0,- Anzahlung</span></div>')
+    return ('<article class="cldt-summary-full-item" id="%s"><div class="ListItem_wrapper__J_a_C">'
+            '<div class="ListItem_header__uPzec"><a href="/angebote/%s"><h2>%s '
+            '<span class="ListItem_version__jNjur">%s</span></h2></a>%s</div>%s'
+            '<div class="VehicleDetailTable_container__mUUbY">%s</div>%s</div>'
+            '<div class="SellerInfo_wrapper__XttVo"><span class="SellerInfo_address__txoNV" style="grid-area:address">%s</span></div>'
+            '</article>\n') % (e(listingID), e(listingID), e(title), e(car.Version), subtitle, price, details, extra, e(car.Standort))
+
+
+def iterHTMLPages(AutoDFraw, pageSize=PAGE_SIZE):
+    """Erzeugt Suchergebnisseiten (HTML) mit je *pageSize* Inseraten aus Rohdaten."""
+    for start in range(0, len(AutoDFraw), pageSize):
+        articles = "".join(_articleHTML(start + i, car)
+                           for i, car in enumerate(AutoDFraw.iloc[start:start + pageSize].itertuples(index=False)))
+        yield ('<!DOCTYPE html>\n<html lang="de">\n<head><meta charset="utf-8"></head>\n<body>\n'
+               '<main class="ListPage_main__L0gsf">\n%s</main>\n</body>\n</html>\n' % articles)
+
+
+def writeHTMLPages(AutoDFraw, directory, pageSize=PAGE_SIZE):
+    """Schreibt die Seiten als page_000000.html, ... und gibt deren Anzahl zurück."""
+    os.makedirs(directory, exist_ok=True)
+    count = 0
+    for count, page in enumerate(iterHTMLPages(AutoDFraw, pageSize), start=1):
+        with open(os.path.join(directory, "page_%06d.html" % (count - 1)), "w", encoding="utf-8") as f:
+            f.write(page)
+    return count
+
+
+def loadSource(path):
+    """Lädt das Ausgangs-Dataframe und bereinigt es, falls es sich um Rohdaten handelt."""
+    from . import clean, snapshot
+
+    AutoDF = pd.read_parquet(path) if path.endswith(".parquet") else snapshot.loadSnapshot(path)
+    if "Standort" in AutoDF.columns:
+        AutoDF = clean.cleanAutoDF(AutoDF)
+    return AutoDF
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Synthetische Autoscout24 Inserate erzeugen")
+    parser.add_argument("source", help="AutoDF bzw. AutoDFraw (.pkl, .parquet oder Excel-Backup)")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--out", help="Rohdaten als Pickle/Parquet speichern")
+    parser.add_argument("--html-dir", help="Rohdaten als HTML-Suchergebnisseiten speichern")
+    args = parser.parse_args(argv)
+
+    sampleDF = ListingModel(loadSource(args.source)).sample(args.rows, args.seed)
+    AutoDFraw = toRawFrame(sampleDF, seed=args.seed)
+    if args.out:
+        if args.out.endswith(".parquet"):
+            AutoDFraw.to_parquet(args.out)
+        else:
+            AutoDFraw.to_pickle(args.out)
+    if args.html_dir:
+        print("%d Seiten geschrieben" % writeHTMLPages(AutoDFraw, args.html_dir))
+    print("%d synthetische Inserate erzeugt" % len(AutoDFraw))
+
+
+if __name__ == "__main__":
+    main()
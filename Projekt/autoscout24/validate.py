@@ -0,0 +1,114 @@
+"""Deklarative Prüfregeln für das aufbereitete AutoDF.
+
+Jede Regel in RULES beschreibt, welche Bedingung eine Spalte erfüllen muss.
+*validateAutoDF* prüft alle Regeln in einem vektorisierten Durchlauf über den
+Batch. Zeilen, die mindestens eine Regel verletzen, landen mit den Namen der
+verletzten Regeln in der Quarantäne statt in den Auswertungen. Die Anzahl der
+Treffer je Regel wird zurückgegeben und als Metrik rule_hits_total{rule}
+gezählt; eine Zeile kann mehrere Regeln verletzen. Die tatsächlich entfernten
+Zeilen zählt rows_dropped_total{stage="validate"}::
+
+    valid, quarantine, hits = validateAutoDF(transformRaw(AutoDFraw), raw=AutoDFraw)
+
+Mit *raw* enthält die Quarantäne die unveränderten Rohdaten der Zeilen, damit
+sich nachvollziehen lässt, welcher gecrawlte Wert eine Regel verletzt hat.
+
+Da die numerischen Spalten hier bereits geprüft und umgewandelt werden, kann
+die anschließende Typumwandlung nicht mehr an unplausiblen Werten scheitern.
+"""
+
+import datetime
+
+import pandas as pd
+
+from .metrics import METRICS
+
+NUMERIC_COLUMNS = ["Preis", "km", "PS", "Erstzulassung", "Verbrauch_l_pro_100km", "Emissionen_g_pro_km"]
+
+# Monatsraten von Leasingangeboten, die als Kaufpreis gelesen werden, liegen unter MIN_PREIS
+MIN_PREIS = 500
+
+# (Regel, Spalte, Prüfung, Parameter)
+#   notna:   Wert vorhanden (bei numerischen Spalten: als Zahl lesbar)
+#   nonzero: Wert vorhanden und ungleich 0; Parameter (Spalte, Wert) nimmt Zeilen
+#            mit diesem Wert aus, sie erhalten den Wert 0
+#   false:   Flag nicht gesetzt
+#   between: Wert im Intervall [min, max]; fehlende Werte prüfen die notna-Regeln
+#   nomatch: Text enthält das Muster nicht; fehlender Text verletzt die Regel
+RULES = [
+    ("Preis fehlt", "Preis", "notna", None),
+    #Elektroautos haben keinen Verbrauch und keine Emissionen, dort ist keine Angabe korrekt
+    ("Verbrauch fehlt", "Verbrauch_l_pro_100km", "nonzero", ("Kraftstoff", "Elektro")),
+    ("Emissionen fehlen", "Emissionen_g_pro_km", "nonzero", ("Kraftstoff", "Elektro")),
+    ("km fehlt", "km", "notna", None),
+    ("PS fehlt", "PS", "notna", None),
+    #Leasing Fahrzeuge verfälschen mit dem Monatspreis die Statistiken
+    ("Leasing", "Leasing", "false", None),
+    ("Getriebe fehlt", "Getriebe", "nomatch", r"- \(Getriebe\)"),
+    ("Preis unplausibel", "Preis", "between", (MIN_PREIS, 5000000)),
+    ("PS unplausibel", "PS", "between", (1, 2000)),
+    ("km unplausibel", "km", "between", (0, 2000000)),
+    ("Erstzulassung unplausibel", "Erstzulassung", "between", (1900, datetime.date.today().year + 1)),
+    ("Verbrauch unplausibel", "Verbrauch_l_pro_100km", "between", (0, 50)),
+    ("Emissionen unplausibel", "Emissionen_g_pro_km", "between", (0, 1000)),
+]
+
+
+def _exempt(AutoDF, check, param):
+    """Maske der Zeilen, für die eine nonzero-Regel nicht gilt."""
+    if check != "nonzero" or param is None or param[0] not in AutoDF.columns:
+        return pd.Series(False, index=AutoDF.index)
+    column, value = param
+    return (AutoDF[column] == value).fillna(False).astype(bool)
+
+
+def _check(values, check, param):
+    """Maske der Zeilen, die die Regel verletzen."""
+    if check == "notna":
+        return values.isna()
+    if check == "nonzero":
+        return values.isna() | (values == 0)
+    if check == "false":
+        return values.fillna(False).astype(bool)
+    if check == "between":
+        low, high = param
+        return values.notna() & ~values.between(low, high)
+    if check == "nomatch":
+        return values.astype(object).str.contains(param, na=True).astype(bool)
+    raise ValueError("unbekannte Prüfung %r" % check)
+
+
+def validateAutoDF(AutoDF, rules=RULES, raw=None):
+    """Prüft alle Regeln und teilt AutoDF in gültige Zeilen und Quarantäne.
+
+    Gibt (gültige Zeilen mit numerischen Spalten, Quarantäne mit Spalte
+    "Gründe", Treffer je Regel) zurück. Die Quarantäne enthält die Zeilen aus
+    *raw* (Rohdaten mit gleichem Index) bzw. ohne *raw* die Werte aus AutoDF.
+    """
+    numeric = {col: pd.to_numeric(AutoDF[col], errors="coerce") for col in NUMERIC_COLUMNS if col in AutoDF.columns}
+    fails = {}
+    for name, col, check, param in rules:
+        if col not in AutoDF.columns:
+            continue
+        exempt = _exempt(AutoDF, check, param)
+        if exempt.any() and col in numeric:
+            numeric[col] = numeric[col].mask(exempt, 0)
+        fails[name] = _check(numeric.get(col, AutoDF[col]), check, param) & ~exempt
+    fails = pd.DataFrame(fails, index=AutoDF.index)
+    names = list(fails.columns)
+
+    hits = fails.sum()
+    for name, count in hits.items():
+        METRICS.inc("rule_hits_total", int(count), rule=name)
+
+    failed = fails.any(axis=1)
+    quarantine = (AutoDF if raw is None else raw)[failed].copy()
+    #Namen aller verletzten Regeln je Zeile
+    quarantine["Gründe"] = fails[failed].dot(pd.Index(names) + "; ").str.rstrip("; ")
+    METRICS.inc("rows_quarantined_total", len(quarantine))
+    METRICS.inc("rows_dropped_total", len(quarantine), stage="validate")
+
+    valid = AutoDF[~failed].copy()
+    for col, values in numeric.items():
+        valid[col] = values[~failed]
+    return valid, quarantine, hits
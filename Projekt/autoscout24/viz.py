@@ -0,0 +1,202 @@
+"""Plotly Visualisierungen des bereinigten AutoDF.
+
+Im Lightweight-Modus (*setLightweightMode*) werden die Daten der Plots bereits
+beim Build voraggregiert (Histogramm-Bins, Boxplot-Quartile, Stichprobe beim
+Scatterplot). Die Größe einer Grafik hängt dann nicht mehr von der Anzahl der
+Fahrzeuge ab. Mit *PageBudget* wird zusätzlich ein Größenbudget je Buchseite
+gesetzt: Grafiken, die das Budget überschreiten, werden als PNG gerendert.
+"""
+
+import warnings
+
+import numpy as np
+import plotly.express as px
+import plotly.graph_objs as go
+
+# Standardwerte für den Lightweight-Modus
+PAGE_BUDGET_BYTES = 1024 ** 2
+MAX_POINTS = 2000
+HISTOGRAM_BINS = 50
+
+_LIGHTWEIGHT = False
+
+
+def setLightweightMode(enabled=True, connected=True):
+    """Aktiviert die Voraggregation aller Plots.
+
+    Mit *connected* wird plotly.js aus dem CDN geladen statt in jede Seite
+    eingebettet zu werden.
+    """
+    global _LIGHTWEIGHT
+    _LIGHTWEIGHT = enabled
+    if enabled and connected:
+        import plotly.io as pio
+        pio.renderers.default = "notebook_connected"
+
+
+def _lightweight(lightweight):
+    return _LIGHTWEIGHT if lightweight is None else lightweight
+
+
+def figureSize(fig):
+    """Größe der in die Seite eingebetteten Figure-Daten in Bytes."""
+    return len(fig.to_json().encode())
+
+
+def rasterize(fig, format="png", scale=1):
+    """Rendert eine Figure als statisches Bild (benötigt kaleido)."""
+    from IPython.display import Image
+
+    return Image(fig.to_image(format=format, scale=scale))
+
+
+class PageBudget:
+    """Größenbudget für die interaktiven Grafiken einer Buchseite.
+
+    *show* gibt eine Figure interaktiv zurück, solange sie in das verbleibende
+    Budget passt, und sonst als statisches Bild. Mit maxBytes=None bleiben alle
+    Grafiken interaktiv.
+    """
+
+    def __init__(self, maxBytes=PAGE_BUDGET_BYTES):
+        self.maxBytes = maxBytes
+        self.used = 0
+
+    def show(self, fig):
+        size = figureSize(fig)
+        if self.maxBytes is None or self.used + size <= self.maxBytes:
+            self.used += size
+            return fig
+        try:
+            return rasterize(fig)
+        except Exception as e:
+            warnings.warn("Grafik konnte nicht gerendert werden (%s), wird interaktiv angezeigt" % e)
+            self.used += size
+            return fig
+
+
+def _finite(values):
+    values = np.asarray(values, dtype=float)
+    return values[~np.isnan(values)]
+
+
+def _binEdges(values, nbins=HISTOGRAM_BINS, binSize=None):
+    """Bin-Grenzen über *values*; mit *binSize* an Vielfachen von binSize ausgerichtet."""
+    values = _finite(values)
+    if not len(values):
+        return np.array([0.0, 1.0])
+    if not binSize:
+        return np.histogram_bin_edges(values, bins=nbins)
+    start = np.floor(values.min() / binSize) * binSize
+    return np.arange(start, values.max() + binSize, binSize)
+
+
+def _histogramBars(values, nbins=HISTOGRAM_BINS, binSize=None, edges=None):
+    values = _finite(values)
+    if edges is None:
+        edges = _binEdges(values, nbins, binSize)
+    counts, edges = np.histogram(values, bins=edges)
+    return (edges[:-1] + edges[1:]) / 2, counts, np.diff(edges)
+
+
+def _boxStats(AutoDF, group, col):
+    """Quartile und Whisker (1,5 * IQR) je Gruppe für go.Box."""
+    grouped = AutoDF.groupby(group, observed=True)[col]
+    stats = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+    stats.columns = ["q1", "median", "q3"]
+    iqr = stats["q3"] - stats["q1"]
+    stats["lowerfence"] = np.maximum(stats["q1"] - 1.5 * iqr, grouped.min())
+    stats["upperfence"] = np.minimum(stats["q3"] + 1.5 * iqr, grouped.max())
+    return stats
+
+
+def _aggregatedBox(stats, title=None, horizontal=False, xTitle=None, yTitle=None):
+    categories = [str(c) for c in stats.index]
+    box = dict(q1=stats["q1"], median=stats["median"], q3=stats["q3"],
+               lowerfence=stats["lowerfence"], upperfence=stats["upperfence"], boxpoints=False)
+    if horizontal:
+        box.update(y=categories, orientation="h")
+    else:
+        box.update(x=categories)
+    fig = go.Figure(go.Box(**box))
+    fig.update_layout(title_text=title, xaxis_title=xTitle, yaxis_title=yTitle)
+    return fig
+
+
+def preisHistogram(AutoDF, lightweight=None):
+    if not _lightweight(lightweight):
+        return px.histogram(AutoDF, x="Preis", title="Distribution over price (Euro)")
+    centers, counts, widths = _histogramBars(AutoDF["Preis"])
+    fig = go.Figure(go.Bar(x=centers, y=counts, width=widths))
+    fig.update_layout(title_text="Distribution over price (Euro)", xaxis_title="Preis", yaxis_title="count", bargap=0)
+    return fig
+
+
+def preisBoxByMarke(AutoDF, sorted_nb=None, lightweight=None):
+    """Boxplot Preis je Marke, sortiert nach Median-Preis."""
+    order = list(sorted_nb.index) if sorted_nb is not None else None
+    if not _lightweight(lightweight):
+        return px.box(AutoDF, x="Preis", y="Marke", orientation="h",
+                      category_orders={"Marke": order} if order else None)
+    stats = _boxStats(AutoDF, "Marke", "Preis")
+    stats = stats.reindex(order) if order else stats.sort_values("median")
+    return _aggregatedBox(stats, horizontal=True, xTitle="Preis", yTitle="Marke")
+
+
+def preisBoxByErstzulassung(AutoDF, lightweight=None):
+    if not _lightweight(lightweight):
+        return px.box(data_frame=AutoDF, x="Erstzulassung", y="Preis", hover_name="Titel")
+    stats = _boxStats(AutoDF, "Erstzulassung", "Preis").sort_index()
+    stats.index = stats.index.astype(int)
+    return _aggregatedBox(stats, xTitle="Erstzulassung", yTitle="Preis")
+
+
+def preisBarByKraftstoff(PriceAveragePerKraftstoff):
+    return px.bar(x=PriceAveragePerKraftstoff.index.astype(str), y=PriceAveragePerKraftstoff.values,
+                  title="Durschnittlicher Preis nach Kraftstoff")
+
+
+def preisScatterPS(AutoDF, lightweight=None, maxPoints=MAX_POINTS):
+    """Scatterplot Preis über PS mit OLS Trendlinie.
+
+    Im Lightweight-Modus wird die Trendlinie auf allen Daten berechnet, aber nur
+    eine Stichprobe von *maxPoints* Fahrzeugen gezeichnet.
+    """
+    if not _lightweight(lightweight):
+        return px.scatter(AutoDF, x="PS", y="Preis", color="Emissionen_g_pro_km", size="Verbrauch_l_pro_100km",
+                          hover_data=["Marke", "Titel", "Kraftstoff"], title="Price over PS",
+                          trendline="ols")
+    sample = AutoDF.sample(maxPoints, random_state=0) if len(AutoDF) > maxPoints else AutoDF
+    fig = px.scatter(sample, x="PS", y="Preis", color="Emissionen_g_pro_km", size="Verbrauch_l_pro_100km",
+                     hover_data=["Marke", "Titel", "Kraftstoff"], title="Price over PS")
+    slope, intercept = np.polyfit(AutoDF["PS"].astype(float), AutoDF["Preis"].astype(float), 1)
+    x = np.array([AutoDF["PS"].min(), AutoDF["PS"].max()], dtype=float)
+    fig.add_trace(go.Scatter(x=x, y=slope * x + intercept, mode="lines", name="OLS trendline", showlegend=False))
+    return fig
+
+
+def preisDistplotGetriebe(AutoDF, lightweight=None):
+    group_labels = ['Automatik', 'Schaltgetriebe', 'Halbautomatik']
+    data = [AutoDF.loc[AutoDF["Getriebe"] == g, "Preis"].values for g in group_labels]
+    if not _lightweight(lightweight):
+        import plotly.figure_factory as ff
+
+        fig = ff.create_distplot(data, group_labels, bin_size=3000, show_rug=False)
+    else:
+        #voraggregierte, auf Dichte normierte Histogramme statt KDE über alle Datenpunkte;
+        #gemeinsame Bin-Grenzen, damit die Balken der Gruppen übereinander liegen
+        edges = _binEdges(np.concatenate(data), binSize=3000)
+        fig = go.Figure()
+        for label, values in zip(group_labels, data):
+            if len(values) == 0:
+                continue
+            centers, counts, widths = _histogramBars(values, edges=edges)
+            fig.add_trace(go.Bar(x=centers, y=counts / (counts.sum() * widths), width=widths, name=label, opacity=0.6))
+        fig.update_layout(barmode="overlay", bargap=0)
+    fig.update_layout(title_text='Preisverteilung nach Getriebe')
+    return fig
+
+
+def verbrauchBarByMarke(MarkenGruppiert):
+    return px.bar(x=MarkenGruppiert.index.astype(str), y=MarkenGruppiert["Verbrauch_l_pro_100km"],
+                  title="Durchschnittlicher Verbrauch pro Automarke (Liter/100km)")
@@ -0,0 +1,24 @@
+from autoscout24 import benchmark
+
+
+def test_measure_returns_median(monkeypatch):
+    times = iter([0.0, 1.0, 1.0, 11.0, 11.0, 13.0])
+    monkeypatch.setattr(benchmark.time, "perf_counter", lambda: next(times))
+    seconds, peak = benchmark._measure(lambda arg: None, None, repeat=3)
+    assert seconds == 2.0
+    assert peak >= 0
+
+
+def test_compare_baseline_ignores_skipped():
+    baseline = {"parse@10": {"rows_per_second": 1000.0, "peak_bytes": 100},
+                "model@10": {"rows_per_second": 500.0, "peak_bytes": 100}}
+    results = {"parse@10": {"rows_per_second": 700.0, "peak_bytes": 100},
+               "model@10": {"skipped": "statsmodels nicht installiert"}}
+    regressions = benchmark.compareBaseline(results, baseline, threshold=0.2)
+    assert len(regressions) == 1 and regressions[0].startswith("parse@10")
+
+
+def test_run_benchmarks_reports_all_benchmarks():
+    results = benchmark.runBenchmarks(scales=[2], repeat=1)
+    assert {"parse@2", "clean@2", "storage@2", "aggregate@2", "model@2"} <= set(results)
+    assert results["parse@2"]["rows"] == 32
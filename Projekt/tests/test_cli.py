@@ -0,0 +1,57 @@
+import os
+
+import pandas as pd
+import pytest
+import requests
+
+from autoscout24 import cli, crawl, storage
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures")
+
+
+def _fixturePage(name):
+    with open(os.path.join(FIXTURE_DIR, name), encoding="utf-8") as f:
+        return crawl.parsePageCarDF(f.read())
+
+
+@pytest.fixture
+def fakeCrawl(monkeypatch):
+    pages = [_fixturePage(name) for name in ["page_normal.html", "page_leasing.html", "page_elektro.html"]]
+
+    def extract(URL):
+        page = int(URL.rsplit("page=", 1)[1])
+        return pages[page % len(pages)].copy()
+
+    monkeypatch.setattr(crawl, "extractPageCarDF", extract)
+
+
+def test_partitions_keep_global_row_ids(tmp_path, fakeCrawl):
+    code, stats = cli.runPipeline([2015, 2016], pages=3, workers=2, sink="pickle:%s" % tmp_path)
+    assert code == cli.EXIT_OK, stats
+
+    raw = pd.read_pickle(tmp_path / ("%s.pkl" % storage.RAW_TABLE))
+    cleaned = pd.read_pickle(tmp_path / ("%s.pkl" % storage.CLEANED_TABLE))
+    quarantine = pd.read_pickle(tmp_path / ("%s.pkl" % storage.QUARANTINE_TABLE))
+
+    assert raw.index.is_unique
+    assert cleaned.index.is_unique and quarantine.index.is_unique
+    assert cleaned.index.intersection(quarantine.index).empty
+    assert len(cleaned) + len(quarantine) == len(raw)
+    #jede Zeile verweist auf dieselbe Zeile der Rohdaten
+    assert (cleaned["ID"] == raw.loc[cleaned.index, "ID"]).all()
+    assert (quarantine["ID"] == raw.loc[quarantine.index, "ID"]).all()
+
+
+def test_timeout_is_a_failed_page(monkeypatch):
+    calls = []
+
+    def get(URL, timeout=None):
+        calls.append(timeout)
+        raise requests.Timeout("read timed out")
+
+    monkeypatch.setattr(requests, "get", get)
+    AutoDFyear, failedPages = cli.crawlYear(2015, pages=2)
+    assert AutoDFyear.empty
+    assert [p["page"] for p in failedPages] == [0, 1]
+    assert failedPages[0]["error"].startswith("Timeout")
+    assert calls == [crawl.FETCH_TIMEOUT] * 2
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from autoscout24 import benchmark, clean
+from autoscout24.compact import _downcast, compactAutoDF
+
+
+@pytest.fixture(scope="module")
+def AutoDF():
+    return clean.cleanAutoDF(benchmark._parse(benchmark.loadCorpus()))
+
+
+def test_target_dtypes(AutoDF):
+    compactDF, report = compactAutoDF(AutoDF)
+    assert compactDF["km"].dtype == np.uint32
+    assert compactDF["Preis"].dtype == np.uint32
+    assert compactDF["PS"].dtype == np.uint16
+    assert compactDF["Erstzulassung"].dtype == np.uint16
+    assert isinstance(compactDF["Marke"].dtype, pd.CategoricalDtype)
+    assert compactDF["Sitzheizung"].dtype == bool
+    pd.testing.assert_series_equal(compactDF["km"].astype("int64"), AutoDF["km"].astype("int64"))
+
+
+def test_missing_values_use_nullable_dtype():
+    compactDF, _ = compactAutoDF(pd.DataFrame({"PS": [150, None, 90], "Verbrauch_l_pro_100km": [5.1, None, 4.2]}))
+    assert compactDF["PS"].dtype == "UInt16"
+    assert compactDF["PS"].isna().tolist() == [False, True, False]
+    assert compactDF["PS"].iloc[0] == 150
+    assert compactDF["Verbrauch_l_pro_100km"].dtype == np.float32
+
+
+def test_downcast_falls_back_for_negative_and_overflowing_values():
+    negative = _downcast(pd.Series([-5, 200]), "uint16")
+    assert negative.dtype == np.int16
+    assert negative.tolist() == [-5, 200]
+
+    overflowing = _downcast(pd.Series([10, 70000]), "uint16")
+    assert overflowing.dtype == np.uint32
+    assert overflowing.tolist() == [10, 70000]
+
+
+def test_memory_report_total(AutoDF):
+    compactDF, report = compactAutoDF(AutoDF)
+    total = report.loc["Gesamt"]
+    columns = report.drop(index="Gesamt")
+    assert "Index" in columns.index
+    assert total["bytes_vorher"] == AutoDF.memory_usage(index=True, deep=True).sum()
+    assert total["bytes_nachher"] == compactDF.memory_usage(index=True, deep=True).sum()
+    assert total["bytes_vorher"] == columns["bytes_vorher"].sum()
+    assert total["Anteil"] == round(total["bytes_nachher"] / total["bytes_vorher"], 3)
+    assert total["Anteil"] < 1
+    assert report.loc["PS", "dtype_nachher"] == "uint16"
@@ -0,0 +1,53 @@
+import os
+
+import pytest
+
+from autoscout24 import crawl
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures")
+
+COLUMNS = ["ID", "Link", "Titel", "Version", "Untertitel", "Preis", "Leasing", "Standort"] + crawl.VEHICLE_DETAIL_COLUMNS
+
+
+def _parse(name):
+    with open(os.path.join(FIXTURE_DIR, name), encoding="utf-8") as f:
+        return crawl.parsePageCarDF(f.read())
+
+
+@pytest.mark.parametrize("name, rows", [("page_normal.html", 6), ("page_leasing.html", 5), ("page_elektro.html", 5)])
+def test_parse_fixture_pages(name, rows):
+    pageCarDF = _parse(name)
+    assert list(pageCarDF.columns) == COLUMNS
+    assert len(pageCarDF) == rows
+    assert pageCarDF["ID"].is_unique
+    assert pageCarDF["Link"].str.startswith(crawl.HOST + "/angebote/").all()
+
+
+def test_parse_normal_listing():
+    car = _parse("page_normal.html").iloc[0]
+    assert car["Titel"].startswith("Audi A4 Avant")
+    assert car["Version"] == "Avant 2.0 TDI S tronic"
+    assert car["Preis"] == "€ 18.490,-"
+    assert not car["Leasing"]
+    assert car["km"] == "98.500 km"
+    assert car["PS"] == "110 kW (150 PS)"
+    assert car["Kraftstoff"] == "Diesel"
+
+
+def test_parse_leasing_listing_uses_vehicle_details():
+    pageCarDF = _parse("page_leasing.html")
+    leasing = pageCarDF[pageCarDF["Leasing"]]
+    assert len(leasing) >= 1
+    car = leasing.iloc[0]
+    assert car["Preis"].endswith("mtl.")
+    #die zusätzliche Tabelle mit den Leasingkonditionen ersetzt nicht die Fahrzeugdaten
+    assert car["Erstzulassung"] == "06/2021"
+    assert car["Kraftstoff"] == "Benzin"
+
+
+def test_parse_missing_subtitle_and_elektro():
+    pageCarDF = _parse("page_elektro.html")
+    assert pageCarDF["Untertitel"].isna().any()
+    assert (pageCarDF["Kraftstoff"] == "Elektro").all()
+    #fehlender Verbrauch bleibt als Platzhalter stehen und wird erst in clean behandelt
+    assert (pageCarDF["Verbrauch_l_pro_100km"] == "- (l/100 km)").any()
@@ -0,0 +1,181 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from autoscout24 import crawlqueue
+from autoscout24.crawlqueue import CrawlQueue
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(crawlqueue.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def queue(tmp_path, clock):
+    return CrawlQueue(str(tmp_path / "queue.sqlite"), maxAttempts=2, leaseSeconds=60, backoffSeconds=10)
+
+
+def test_enqueue_claim_complete(queue):
+    assert queue.enqueue([2015, 2016], 2) == 4
+    queue.enqueue([2015], 2)
+    assert queue.progress() == {"pending": 4}
+
+    jobs = queue.claim(3, "w1")
+    assert jobs == [(2015, 2015, 0), (2015, 2015, 1), (2016, 2016, 0)]
+    assert queue.claim(3, "w2") == [(2016, 2016, 1)]
+    queue.complete(jobs)
+    assert queue.progress() == {"done": 3, "running": 1}
+
+
+def test_fail_backs_off_then_fails(queue, clock):
+    queue.enqueue([2015], 1)
+    job = queue.claim(1)[0]
+    queue.fail(job, "Timeout")
+    assert queue.progress() == {"pending": 1}
+    assert queue.claim(1) == []
+    assert queue.nextDue() == clock.now + 10
+
+    clock.now += 10
+    assert queue.claim(1) == [job]
+    queue.fail(job, "Timeout")
+    assert queue.progress() == {"failed": 1}
+    assert queue.nextDue() is None
+    assert queue.failedJobs() == [(2015, 2015, 0, 2, "Timeout")]
+
+    assert queue.retryFailed() == 1
+    assert queue.claim(1) == [job]
+
+
+def test_expired_lease_is_reclaimed_or_failed(queue, clock):
+    queue.enqueue([2015], 2)
+    first, second = queue.claim(2, "abgestürzt")
+    clock.now += 61
+    #ein Versuch übrig: wird neu vergeben
+    assert queue.claim(2, "w2") == [first, second]
+    clock.now += 61
+    #keine Versuche mehr: fehlgeschlagen statt für immer 'running'
+    assert queue.claim(2, "w3") == []
+    assert queue.progress() == {"failed": 2}
+    assert queue.failedJobs()[0][4] == "Reservierung abgelaufen"
+
+
+def test_old_queue_gets_notbefore_column(tmp_path):
+    path = str(tmp_path / "old.sqlite")
+    con = sqlite3.connect(path)
+    con.execute(crawlqueue._SCHEMA.replace("    notbefore REAL,\n", ""))
+    con.execute("INSERT INTO jobs (fregfrom, fregto, page) VALUES (2015, 2015, 0)")
+    con.commit()
+    con.close()
+    assert CrawlQueue(path).claim(5) == [(2015, 2015, 0)]
+
+
+def test_drain_queue_retries_and_writes_checkpoints(tmp_path):
+    queue = CrawlQueue(str(tmp_path / "queue.sqlite"), backoffSeconds=0)
+    queue.enqueue([2015, 2016], 2)
+    calls = []
+
+    def fetch(URL):
+        calls.append(URL)
+        if len(calls) == 1:
+            raise TimeoutError("read timed out")
+        return pd.DataFrame({"ID": [URL, None], "Preis": ["€ 1.000,-", "€ 2.000,-"]})
+
+    done, failed = crawlqueue.drainQueue(queue, str(tmp_path / "checkpoints"), batchSize=3, fetch=fetch,
+                                         sleep=lambda seconds: None)
+    assert (done, failed) == (4, 1)
+    assert queue.progress() == {"done": 4}
+
+    partitions = crawlqueue.loadCheckpoints(str(tmp_path / "checkpoints"))
+    assert sorted(partitions) == [2015, 2016]
+    assert len(partitions[2015]) == 4
+
+
+def test_load_checkpoints_deduplicates_only_known_ids(tmp_path):
+    checkpointDir = str(tmp_path / "checkpoints")
+    batch = pd.DataFrame({"ID": ["a", None, "b"], "Preis": ["1", "2", "3"]})
+    #derselbe Batch zweimal geschrieben (Abbruch zwischen Speichern und Markieren)
+    crawlqueue._writeBatch({2015: [batch]}, checkpointDir)
+    crawlqueue._writeBatch({2015: [batch]}, checkpointDir)
+    partitions = crawlqueue.loadCheckpoints(checkpointDir, fregList=[2015])
+    assert partitions[2015]["ID"].notna().sum() == 2
+    assert partitions[2015]["ID"].isna().sum() == 2
+    assert crawlqueue.loadCheckpoints(checkpointDir, fregList=[2016]) == {}
+
+
+def test_drain_queue_waits_for_backoff(queue, clock, tmp_path):
+    queue.enqueue([2015], 1)
+    waits = []
+
+    def sleep(seconds):
+        waits.append(seconds)
+        clock.now += seconds
+
+    def fetch(URL):
+        if not waits:
+            raise ConnectionError("reset")
+        return pd.DataFrame({"ID": ["a"]})
+
+    assert crawlqueue.drainQueue(queue, str(tmp_path / "checkpoints"), fetch=fetch, sleep=sleep) == (1, 1)
+    assert waits == [crawlqueue.POLL_SECONDS, 10 - crawlqueue.POLL_SECONDS]
+
+
+def _fetchOK(URL):
+    return pd.DataFrame({"ID": [URL]})
+
+
+def test_restarted_worker_resumes_its_crashed_batch(queue, tmp_path):
+    queue.enqueue([2015], 3)
+    #Worker stürzt nach dem Reservieren ab
+    assert len(queue.claim(2, "worker-0")) == 2
+    result = crawlqueue.drainQueue(queue, str(tmp_path / "checkpoints"), worker="worker-0", fetch=_fetchOK,
+                                   sleep=pytest.fail)
+    assert result == (3, 0)
+    assert queue.progress() == {"done": 3}
+    assert len(crawlqueue.loadCheckpoints(str(tmp_path / "checkpoints"))[2015]) == 3
+
+
+def test_other_worker_waits_for_expired_lease(queue, clock, tmp_path):
+    queue.enqueue([2015], 3)
+    queue.claim(2, "abgestürzt")
+    waits = []
+
+    def sleep(seconds):
+        waits.append(seconds)
+        clock.now += seconds
+
+    result = crawlqueue.drainQueue(queue, str(tmp_path / "checkpoints"), worker="neu", fetch=_fetchOK, sleep=sleep)
+    assert result == (3, 0)
+    assert queue.progress() == {"done": 3}
+    assert sum(waits) >= 60
+
+
+def test_run_pipeline_reports_unfinished_jobs(tmp_path, monkeypatch):
+    from autoscout24 import benchmark, cli
+
+    page = benchmark._parse(benchmark.loadCorpus()[:1])
+
+    def drainOne(queue, checkpointDir, worker=None):
+        #ein Lauf, der nach dem ersten Batch abbricht
+        jobs = queue.claim(1, worker)
+        crawlqueue._writeBatch({2015: [page]}, checkpointDir)
+        queue.complete(jobs)
+        return len(jobs), 0
+
+    monkeypatch.setattr(crawlqueue, "drainQueue", drainOne)
+    code, stats = cli.runPipeline([2015], pages=3, workers=1, queue=str(tmp_path / "queue.sqlite"),
+                                  checkpointDir=str(tmp_path / "checkpoints"))
+    assert code == cli.EXIT_PARTIAL
+    assert stats["status"] == "partial"
+    assert [p["page"] for p in stats["stages"]["crawl"]["failed_pages"]["2015"]] == [1, 2]
@@ -0,0 +1,107 @@
+import collections
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from autoscout24 import benchmark, clean
+from autoscout24.dashboard import DashboardCube
+
+
+@pytest.fixture(scope="module")
+def AutoDF():
+    return clean.cleanAutoDF(benchmark._parse(benchmark.loadCorpus()))
+
+
+@pytest.fixture(scope="module")
+def largeAutoDF(AutoDF):
+    """Fixture-Korpus 60-fach vervielfältigt, mit gestreuten Preisen."""
+    rng = np.random.default_rng(1)
+    large = pd.concat([AutoDF] * 60, ignore_index=True)
+    large["Preis"] = (large["Preis"] * rng.uniform(0.6, 1.4, len(large))).round()
+    return large
+
+
+def _quantileBounds(preis, q, edges):
+    """Bereich für das Quantil aus Histogramm-Zählern: eine Beobachtung und eine Bin-Breite Spiel."""
+    step = 1 / len(preis)
+    lower, upper = preis.quantile([max(q - step, 0), min(q + step, 1)])
+    width = np.diff(edges)[np.clip(np.searchsorted(edges, [lower, upper]) - 1, 0, len(edges) - 2)]
+    return lower - width[0], upper + width[1]
+
+
+def _pairs(ps, preis):
+    return collections.Counter(zip(np.asarray(ps, dtype=float), np.asarray(preis, dtype=float)))
+
+
+def test_histogram_matches_numpy(AutoDF):
+    cube = DashboardCube(AutoDF)
+    mask = cube.select(kraftstoff=["Diesel", "Benzin"])
+    fig = cube.histogramFigure(mask)
+    selected = AutoDF.loc[AutoDF["Kraftstoff"].isin(["Diesel", "Benzin"]), "Preis"]
+    expected, _ = np.histogram(selected, bins=cube.edges)
+    np.testing.assert_array_equal(fig.data[0].y, expected)
+    assert sum(fig.data[0].y) == len(selected)
+
+
+def test_kraftstoff_means_match_groupby(AutoDF):
+    cube = DashboardCube(AutoDF)
+    fig = cube.kraftstoffFigure(cube.select(jahrVon=2017, jahrBis=2020))
+    selected = AutoDF[AutoDF["Erstzulassung"].between(2017, 2020)]
+    expected = selected.groupby("Kraftstoff", observed=True)["Preis"].mean()
+    means = dict(zip(fig.data[0].x, fig.data[0].y))
+    assert set(means) == set(expected.index.astype(str))
+    for kraftstoff, mean in expected.items():
+        assert means[str(kraftstoff)] == pytest.approx(mean)
+
+
+def test_box_quartiles_within_bin_tolerance(largeAutoDF):
+    cube = DashboardCube(largeAutoDF)
+    mask = cube.select(getriebe=["Automatik"])
+    box = cube.boxFigure(mask).data[0]
+    selected = largeAutoDF[largeAutoDF["Getriebe"] == "Automatik"]
+    groups = {str(marke): preis for marke, preis in selected.groupby("Marke", observed=True)["Preis"]}
+    assert sorted(box.y) == sorted(groups)
+    for i, marke in enumerate(box.y):
+        for name, q in [("q1", 0.25), ("median", 0.5), ("q3", 0.75)]:
+            lower, upper = _quantileBounds(groups[marke], q, cube.quantileEdges)
+            assert lower <= getattr(box, name)[i] <= upper, (marke, name)
+    medians = np.asarray(box.median)
+    assert (np.diff(medians) >= 0).all()
+
+
+def test_sample_draws_from_selected_cells(largeAutoDF):
+    cube = DashboardCube(largeAutoDF, maxPoints=50)
+    mask = cube.select(marke=["Volkswagen", "BMW"])
+    ps, preis = cube._sample(mask)
+    selected = largeAutoDF[largeAutoDF["Marke"].isin(["Volkswagen", "BMW"])]
+    assert 50 <= len(ps) <= 50 + mask.sum()
+    pairs = _pairs(selected["PS"], selected["Preis"])
+    for pair, count in _pairs(ps, preis).items():
+        assert pairs[pair] >= count
+
+    #genug Platz: alle Fahrzeuge der Auswahl kommen genau einmal vor
+    cube = DashboardCube(largeAutoDF, maxPoints=10000)
+    ps, preis = cube._sample(cube.select(marke=["Volkswagen", "BMW"]))
+    assert _pairs(ps, preis) == pairs
+
+
+def test_empty_selection(AutoDF):
+    cube = DashboardCube(AutoDF)
+    figures = cube.figures(marke=["Lada"])
+    assert sum(figures["histogram"].data[0].y) == 0
+    assert len(figures["bar_kraftstoff"].data[0].x) == 0
+    assert len(figures["box_marke"].data[0].y or ()) == 0
+    assert len(figures["scatter_ps"].data) == 1 and len(figures["scatter_ps"].data[0].x) == 0
+
+
+def test_figures_are_cached_per_filter(AutoDF, monkeypatch):
+    cube = DashboardCube(AutoDF)
+    first = cube.figures(marke=["BMW", "Audi"], jahrVon=2016)
+    assert cube.figures(marke=["Audi", "BMW"], jahrVon=2016) is first
+    other = cube.figures(marke=["Audi"], jahrVon=2016)
+    assert other is not first
+    assert len(cube._cache) == 2
+    monkeypatch.setattr("autoscout24.dashboard.CACHE_SIZE", 2)
+    cube.figures()
+    assert list(cube._cache) == [(("Audi",), (), (), 2016, None), ((), (), (), None, None)]
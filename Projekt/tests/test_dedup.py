@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+from autoscout24 import dedup
+from autoscout24.metrics import METRICS
+
+
+def _listing(ID, km=50000, titel="Volkswagen Golf\xa0", version="1.4 TSI Comfortline", marke="Volkswagen",
+             untertitel="Klimaanlage, Sitzheizung, Einparkhilfe vorne und hinten, Tempomat", ps=125):
+    return {"ID": ID, "Titel": titel, "Version": version, "Untertitel": untertitel, "Marke": marke,
+            "Erstzulassung": 2015, "PS": ps, "km": km}
+
+
+def test_minhash_similarity_estimates_jaccard():
+    AutoDF = pd.DataFrame([_listing("a"), _listing("b"), _listing("c", titel="Opel Astra\xa0", version="GTC",
+                                                                    untertitel="Panoramadach Leder")])
+    signatures, hasText = dedup.minhashSignatures(AutoDF)
+    assert signatures.dtype == np.uint32 and hasText.all()
+    assert (signatures[0] == signatures[1]).all()
+    assert (signatures[0] == signatures[2]).mean() < 0.3
+
+
+def test_drop_duplicates_keeps_first_listing():
+    AutoDF = pd.DataFrame([
+        _listing("original"),
+        #erneut eingestellt, mit einem zusätzlichen Wort und etwas mehr Kilometern
+        _listing("kopie", km=50300, untertitel="Klimaanlage, Sitzheizung, Einparkhilfe vorne und hinten, Tempomat, "
+                                               "Garantie"),
+        _listing("anderes-auto", km=120000),
+        _listing("andere-marke", titel="Seat Leon\xa0", marke="Seat"),
+    ], index=[5, 6, 7, 8])
+    METRICS.reset()
+    kept, duplicates = dedup.dropDuplicateListings(AutoDF)
+    assert kept["ID"].tolist() == ["original", "anderes-auto", "andere-marke"]
+    assert duplicates["ID"].tolist() == ["kopie"]
+    assert duplicates["Duplikat_von"].tolist() == ["original"]
+    assert METRICS.counter("rows_dropped_total", stage="dedup") == 1
+
+
+def test_duplicates_across_km_bucket_boundary():
+    AutoDF = pd.DataFrame([_listing("a", km=dedup.KM_BUCKET * 10 - 100), _listing("b", km=dedup.KM_BUCKET * 10 + 100)])
+    assert dedup.findDuplicates(AutoDF).tolist() == [0, 0]
+
+
+def test_missing_block_or_text_is_never_a_duplicate():
+    AutoDF = pd.DataFrame([_listing("a", ps=None), _listing("b", ps=None),
+                           _listing("c", titel=None, version=None, untertitel=None),
+                           _listing("d", titel=None, version=None, untertitel=None)])
+    assert dedup.findDuplicates(AutoDF).tolist() == [0, 1, 2, 3]
+
+
+def test_clusters_are_transitive():
+    pairs = np.array([[2, 4], [0, 2], [5, 6]])
+    assert dedup._clusters(7, pairs).tolist() == [0, 1, 0, 3, 0, 5, 5]
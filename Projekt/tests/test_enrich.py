@@ -0,0 +1,95 @@
+import os
+
+import pandas as pd
+import pytest
+
+from autoscout24 import enrich
+from autoscout24.metrics import METRICS
+
+FIXTURES = os.path.join(os.path.dirname(__file__), os.pardir, "fixtures")
+
+
+@pytest.fixture(autouse=True)
+def resetMetrics():
+    METRICS.reset()
+    yield
+    METRICS.reset()
+
+
+@pytest.fixture(scope="module")
+def detailHTML():
+    with open(os.path.join(FIXTURES, "detail_page.html"), encoding="utf-8") as f:
+        return f.read()
+
+
+class FakeFetch:
+    """Ersetzt fetchDetail: liefert je Link eine Antwort und zeichnet die Anfragen auf."""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.calls = []
+
+    def __call__(self, link, cached=None):
+        self.calls.append((link, cached))
+        response = self.responses[link]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def _car(listingID="1", preis=20000):
+    return {"ID": listingID, "Link": "https://example.org/%s" % listingID, "Titel": "Audi A4",
+            "Version": "Avant", "Preis": preis, "km": 50000}
+
+
+def test_fingerprint_hit_skips_request(tmp_path, detailHTML):
+    cache = enrich.DetailCache(str(tmp_path))
+    fetch = FakeFetch({"https://example.org/1": (200, detailHTML, {"ETag": '"v1"'})})
+    data = enrich.enrichListing(_car(), cache, fetch)
+    assert "Klimaautomatik" in data["Ausstattung"] and data["Technik"]["Gänge"] == "7"
+
+    assert enrich.enrichListing(_car(), cache, fetch) == data
+    assert len(fetch.calls) == 1
+    assert METRICS.counter("detail_pages_total", result="fetched") == 1
+    assert METRICS.counter("detail_pages_total", result="cached") == 1
+
+
+def test_changed_fingerprint_refetches_and_reuses_304(tmp_path, detailHTML):
+    cache = enrich.DetailCache(str(tmp_path))
+    fetch = FakeFetch({"https://example.org/1": (200, detailHTML, {"ETag": '"v1"'})})
+    data = enrich.enrichListing(_car(), cache, fetch)
+
+    fetch.responses["https://example.org/1"] = (304, None, {"ETag": '"v1"'})
+    assert enrich.enrichListing(_car(preis=18500), cache, fetch) == data
+    assert len(fetch.calls) == 2
+    assert fetch.calls[1][1]["etag"] == '"v1"'
+    assert METRICS.counter("detail_pages_total", result="not_modified") == 1
+    #der neue Fingerprint ist gespeichert, ein weiterer Aufruf kommt aus dem Cache
+    enrich.enrichListing(_car(preis=18500), cache, fetch)
+    assert len(fetch.calls) == 2
+
+
+def test_304_without_cache_entry_is_an_error(tmp_path):
+    cache = enrich.DetailCache(str(tmp_path))
+    fetch = FakeFetch({"https://example.org/1": (304, None, {})})
+    with pytest.raises(ValueError):
+        enrich.enrichListing(_car(), cache, fetch)
+    assert cache.get("1") is None
+
+
+def test_enrich_autodf_joins_by_id_and_counts_failures(tmp_path, detailHTML):
+    AutoDF = pd.DataFrame([_car("1"), _car("2"), _car("3"), dict(_car("1"), Preis=1)])
+    AutoDF.loc[2, "Link"] = None
+    fetch = FakeFetch({"https://example.org/1": (200, detailHTML, {}),
+                       "https://example.org/2": ConnectionError("timeout")})
+    enriched = enrich.enrichAutoDF(AutoDF, cacheDir=str(tmp_path), workers=2, fetch=fetch)
+
+    assert len(enriched) == len(AutoDF)
+    assert list(enriched["ID"]) == ["1", "2", "3", "1"]
+    assert enriched.loc[[0, 3], "Hubraum"].tolist() == ["1.968 cm³"] * 2
+    assert enriched.loc[0, "Ausstattung"].startswith("Klimaautomatik, Sitzheizung")
+    assert enriched.loc[[1, 2], "Ausstattung"].isna().all()
+    #doppelte IDs werden nur einmal geladen, Inserate ohne Link gar nicht
+    assert len(fetch.calls) == 2
+    assert METRICS.counter("detail_pages_total", result="failed") == 1
+    assert METRICS.counter("detail_pages_total", result="fetched") == 1
@@ -0,0 +1,109 @@
+import datetime
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from autoscout24.history import DepreciationCurves, PriceHistory
+
+
+def _crawl(ids, preise, marke="Audi", modell="A4"):
+    return pd.DataFrame({"ID": ids, "Marke": pd.Categorical([marke] * len(ids)),
+                         "Modell": pd.Categorical([modell] * len(ids)), "Modell_ID": np.int32(3),
+                         "Titel": "%s %s\xa0" % (marke, modell), "Erstzulassung": 2015, "km": 50000, "PS": 150,
+                         "Preis": preise, "Stadt": "Köln"})
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = PriceHistory(str(tmp_path / "history"))
+    history.append(_crawl(["a", "b"], [20000, 15000]), "2024-01-01")
+    history.append(_crawl(["a", "b", "c"], [19000, 15000, 9000]), "2024-02-01")
+    history.append(_crawl(["a", None], [18500, 7000]), datetime.date(2024, 3, 1))
+    return history
+
+
+def test_append_keeps_history_columns(history):
+    AutoDF = history.load()
+    assert len(AutoDF) == 7
+    assert "Stadt" not in AutoDF.columns
+    assert {"Modell", "Modell_ID", "crawl_date"} <= set(AutoDF.columns)
+    assert AutoDF["Modell"].iloc[0] == "A4"
+
+
+def test_load_reads_only_partitions_in_range(history):
+    assert history.partitions("2024-02-01") == [datetime.date(2024, 2, 1), datetime.date(2024, 3, 1)]
+    #eine beschädigte Datei außerhalb des Zeitraums darf nicht gelesen werden
+    with open(os.path.join(history.root, "crawl_date=2024-01-01", "part-kaputt.parquet"), "w") as f:
+        f.write("kein parquet")
+    AutoDF = history.load("2024-02-01", "2024-02-28")
+    assert len(AutoDF) == 3
+    assert (AutoDF["crawl_date"] == pd.Timestamp("2024-02-01")).all()
+    assert history.load("2025-01-01").empty
+
+
+def test_trajectories_and_price_changes(history):
+    trajectories = history.trajectories()
+    assert list(trajectories.index) == ["a", "b", "c"]
+    assert trajectories.loc["a"].tolist() == [20000, 19000, 18500]
+    assert np.isnan(trajectories.loc["c", pd.Timestamp("2024-01-01")])
+
+    changes = history.priceChanges(end="2024-02-01")
+    assert changes.loc["a", "Änderung"] == -1000
+    assert changes.loc["b", "Änderung_Prozent"] == 0
+    assert changes.loc["c", "Beobachtungen"] == 1
+
+
+def _depreciationData(seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for (marke, modell), (a, b, c) in {("Audi", "A4"): (10.3, -0.12, -0.05), ("Audi", "A6"): (10.6, -0.10, -0.04),
+                                       ("Dacia", "Sandero"): (9.5, -0.08, -0.06)}.items():
+        n = 200
+        alter = rng.integers(0, 15, n)
+        km = alter * 15000 + rng.integers(0, 20000, n)
+        preis = np.exp(a + b * alter + c * km / 10000 + rng.normal(0, 0.1, n))
+        rows.append(pd.DataFrame({"Marke": marke, "Modell": modell, "Erstzulassung": 2024 - alter, "km": km,
+                                  "Preis": preis.round(), "crawl_date": pd.Timestamp("2024-06-01")}))
+    rows.append(pd.DataFrame({"Marke": "Seltene", "Modell": "X", "Erstzulassung": [2020] * 3, "km": 10000,
+                              "Preis": 20000, "crawl_date": pd.Timestamp("2024-06-01")}))
+    return pd.concat(rows, ignore_index=True)
+
+
+def test_coefficients_match_least_squares():
+    df = _depreciationData()
+    curves = DepreciationCurves(by=("Marke", "Modell")).fit(df)
+    assert ("Seltene", "X") not in curves.coefficients.index
+    for (marke, modell), group in df.groupby(["Marke", "Modell"]):
+        if len(group) < 10:
+            continue
+        alter = 2024 - group["Erstzulassung"].to_numpy(dtype=float)
+        X = np.column_stack([np.ones(len(group)), alter, group["km"] / 10000])
+        y = np.log(group["Preis"].to_numpy(dtype=float))
+        beta, residuals, _, _ = np.linalg.lstsq(X, y, rcond=None)
+        coef = curves.coefficients.loc[(marke, modell)]
+        np.testing.assert_allclose([coef["a"], coef["b_Alter"], coef["c_km10k"]], beta, atol=1e-5)
+        r2 = 1 - residuals[0] / ((y - y.mean()) ** 2).sum()
+        assert coef["r2"] == pytest.approx(r2, abs=1e-6)
+        assert coef["n"] == len(group)
+
+
+def test_curves_and_predict():
+    curves = DepreciationCurves(maxAge=10).fit(_depreciationData())
+    curve = curves.curve("Audi")
+    assert list(curve.index) == list(range(11))
+    assert curve["Preis"].is_monotonic_decreasing
+    coef = curves.coefficients.loc["Audi"]
+    expected = np.exp(coef["a"] + coef["b_Alter"] * 3 + coef["c_km10k"] * 4.5)
+    assert curves.predict("Audi", 3, 45000) == pytest.approx(expected)
+
+
+def test_fit_by_model_from_history(history):
+    curves = DepreciationCurves(by=("Marke", "Modell"), minObservations=2).fit(history.load())
+    assert list(curves.coefficients.index) == [("Audi", "A4")]
+
+
+def test_fit_missing_group_column():
+    with pytest.raises(ValueError, match="Modell"):
+        DepreciationCurves(by=("Marke", "Modell")).fit(_depreciationData().drop(columns="Modell"))
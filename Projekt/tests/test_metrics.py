@@ -0,0 +1,39 @@
+import pandas as pd
+import pytest
+
+from autoscout24 import cli, validate
+from autoscout24.metrics import METRICS
+
+
+@pytest.fixture(autouse=True)
+def resetMetrics():
+    METRICS.reset()
+    yield
+    METRICS.reset()
+
+
+def _histogramCount(name):
+    return sum(h["count"] for h in METRICS.toDict()["histograms"] if h["name"] == name)
+
+
+def test_rule_hits_and_dropped_rows_are_separate():
+    AutoDF = pd.DataFrame({
+        "Preis": ["12000", None, "300"],
+        "km": ["50000", None, "10000"],
+    })
+    rules = [("Preis fehlt", "Preis", "notna", None), ("km fehlt", "km", "notna", None),
+             ("Preis unplausibel", "Preis", "between", (500, 5000000))]
+    valid, quarantine, hits = validate.validateAutoDF(AutoDF, rules)
+
+    assert len(valid) == 1 and len(quarantine) == 2
+    assert METRICS.counter("rule_hits_total", rule="Preis fehlt") == 1
+    assert METRICS.counter("rule_hits_total", rule="km fehlt") == 1
+    assert METRICS.counter("rule_hits_total", rule="Preis unplausibel") == 1
+    assert METRICS.counter("rows_dropped_total", stage="validate") == 2
+
+
+def test_crawl_year_concat_is_timed(monkeypatch):
+    monkeypatch.setattr(cli.crawl, "extractPageCarDF", lambda URL: pd.DataFrame({"ID": [URL]}))
+    AutoDFyear, failedPages = cli.crawlYear(2015, pages=3)
+    assert len(AutoDFyear) == 3 and not failedPages
+    assert _histogramCount("concat_seconds") == 1
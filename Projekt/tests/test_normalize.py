@@ -0,0 +1,62 @@
+import pandas as pd
+import pytest
+
+from autoscout24 import normalize
+from autoscout24.normalize import ModelIndex
+
+# Titel wie auf der Webseite: nur Marke und Modell, die Version steht separat
+REAL_LISTINGS = [
+    ("Land Rover Range Rover Evoque\xa0", "TD4 SE Dynamic"),
+    ("Land Rover Range Rover Evoque\xa0", "Si4 HSE"),
+    ("Land Rover Range Rover\xa0", "3.0 SDV6 Vogue"),
+    ("Mercedes-Benz E 260\xa0", "Avantgarde"),
+    ("Mercedes Benz E 260\xa0", "AMG Line"),
+    ("Volkswagen Golf\xa0", "1.4 TSI Comfortline"),
+    ("VW Golf\xa0", None),
+]
+
+
+@pytest.fixture
+def realDF():
+    return pd.DataFrame(REAL_LISTINGS, columns=["Titel", "Version"])
+
+
+def test_split_marke_multiword_and_aliases(realDF):
+    assert normalize.splitMarke(realDF["Titel"]).tolist() == [
+        "Land Rover", "Land Rover", "Land Rover", "Mercedes-Benz", "Mercedes-Benz", "Volkswagen", "Volkswagen"]
+
+
+def test_fit_learns_models_from_real_titles(realDF):
+    index = ModelIndex().fit(realDF)
+    assert set(index.modelle) == {("Land Rover", "Range Rover Evoque"), ("Land Rover", "Range Rover"),
+                                  ("Mercedes-Benz", "E 260"), ("Volkswagen", "Golf")}
+
+
+def test_transform_real_titles(realDF):
+    AutoDF = ModelIndex().fit(realDF).transform(realDF)
+    assert AutoDF["Modell"].astype(object).tolist() == [
+        "Range Rover Evoque", "Range Rover Evoque", "Range Rover", "E 260", "E 260", "Golf", "Golf"]
+    assert AutoDF["Ausstattungslinie"].astype(object).tolist()[:4] == [
+        "TD4 SE Dynamic", "Si4 HSE", "3.0 SDV6 Vogue", "Avantgarde"]
+    assert pd.isna(AutoDF["Ausstattungslinie"].iloc[-1])
+    assert AutoDF["Modell_ID"].iloc[0] == AutoDF["Modell_ID"].iloc[1] != AutoDF["Modell_ID"].iloc[2]
+
+
+def test_title_with_version_at_the_end():
+    index = ModelIndex().fit(pd.DataFrame({"Titel": ["Audi A4 Avant 2.0 TDI S tronic"],
+                                           "Version": ["Avant 2.0 TDI S tronic"]}))
+    assert index.parse("Audi A4 Avant 2.0 TDI S tronic", "Avant 2.0 TDI S tronic") == (
+        "Audi", "A4", "Avant 2.0 TDI S tronic")
+    #ohne Version wird das gelernte Modell per Longest-Prefix-Match gefunden
+    assert index.parse("Audi A4 Allroad 3.0 TDI") == ("Audi", "A4", "Allroad 3.0 TDI")
+
+
+def test_codes_stable_after_save_and_load(realDF, tmp_path):
+    index = ModelIndex().fit(realDF)
+    before = index.transform(realDF)
+    index.save(tmp_path / "index.pkl")
+    loaded = ModelIndex.load(tmp_path / "index.pkl")
+    after = loaded.transform(pd.concat([pd.DataFrame({"Titel": ["Porsche 911\xa0"], "Version": ["Carrera S"]}),
+                                        realDF], ignore_index=True))
+    assert after["Modell_ID"].iloc[1:].tolist() == before["Modell_ID"].tolist()
+    assert loaded.modellName(after["Modell_ID"].iloc[0]) == ("Porsche", "911")
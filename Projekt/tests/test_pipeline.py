@@ -0,0 +1,97 @@
+import importlib
+import sys
+
+import pandas as pd
+
+from autoscout24.pipeline import Pipeline, Task, hashContent
+
+
+def _writeModule(path, factor):
+    path.write_text("FACTOR = %d\n\n\ndef scale(AutoDF):\n    return AutoDF * FACTOR\n" % factor)
+
+
+def _loadModule(tmp_path, name):
+    sys.path.insert(0, str(tmp_path))
+    try:
+        sys.modules.pop(name, None)
+        importlib.invalidate_caches()
+        return importlib.import_module(name)
+    finally:
+        sys.path.remove(str(tmp_path))
+
+
+def test_key_changes_with_module_constant(tmp_path):
+    _writeModule(tmp_path / "pipeline_task_a.py", 2)
+    module = _loadModule(tmp_path, "pipeline_task_a")
+    before = Task("scale", module.scale).key(["input"])
+
+    _writeModule(tmp_path / "pipeline_task_a.py", 3)
+    module = _loadModule(tmp_path, "pipeline_task_a")
+    after = Task("scale", module.scale).key(["input"])
+
+    assert before != after
+    assert after == Task("scale", module.scale).key(["input"])
+
+
+def test_key_depends_on_params_and_inputs():
+    task = Task("head", pd.DataFrame.head, params={"n": 5})
+    assert task.key(["a"]) != task.key(["b"])
+    assert task.key(["a"]) != Task("head", pd.DataFrame.head, params={"n": 6}).key(["a"])
+
+
+def test_run_uses_cache(tmp_path):
+    calls = []
+
+    def source():
+        calls.append("source")
+        return pd.DataFrame({"Preis": [1000, 2000]})
+
+    def double(AutoDF):
+        calls.append("double")
+        return AutoDF * 2
+
+    for _ in range(2):
+        pipe = Pipeline(str(tmp_path / "cache"), verbose=False)
+        pipe.add("source", source)
+        pipe.add("double", double, deps=["source"])
+        result = pipe.run("double")
+
+    assert calls == ["source", "double"]
+    assert result["Preis"].tolist() == [2000, 4000]
+    assert hashContent(result) == hashContent(pd.DataFrame({"Preis": [2000, 4000]}))
+
+
+def test_build_pipeline_hashes_referenced_code(tmp_path):
+    from autoscout24 import clean, validate, viz
+    from autoscout24.pipeline import buildPipeline
+
+    pipe = buildPipeline(cacheDir=str(tmp_path), verbose=False)
+    assert clean.splitMarke in pipe.tasks["clean"].code()
+    assert validate.validateAutoDF in pipe.tasks["filter"].code()
+    assert any(obj is validate.RULES for obj in pipe.tasks["filter"].code())
+    assert viz.preisBoxByMarke in pipe.tasks["plot_box_marke"].code()
+    assert viz.preisBarByKraftstoff not in pipe.tasks["plot_box_marke"].code()
+    assert viz.PageBudget in pipe.tasks["page"].code()
+    for name in ["plot_bar_kraftstoff", "plot_verbrauch_marke", "plot_box_marke"]:
+        assert viz not in pipe.tasks[name].code()
+
+
+def _writePlots(path, histogramBins=50, title="Boxplot"):
+    path.write_text("BINS = %d\n\n\ndef _bins(values):\n    return min(len(values), BINS)\n\n\n"
+                    "def histogram(values):\n    return _bins(values)\n\n\n"
+                    "def box(values):\n    return %r\n" % (histogramBins, title))
+
+
+def test_key_ignores_unrelated_module_functions(tmp_path):
+    _writePlots(tmp_path / "pipeline_task_plots.py")
+    module = _loadModule(tmp_path, "pipeline_task_plots")
+    histogram, box = Task("histogram", module.histogram).key([]), Task("box", module.box).key([])
+
+    _writePlots(tmp_path / "pipeline_task_plots.py", title="Preis je Marke")
+    module = _loadModule(tmp_path, "pipeline_task_plots")
+    assert Task("histogram", module.histogram).key([]) == histogram
+    assert Task("box", module.box).key([]) != box
+
+    _writePlots(tmp_path / "pipeline_task_plots.py", histogramBins=30, title="Preis je Marke")
+    module = _loadModule(tmp_path, "pipeline_task_plots")
+    assert Task("histogram", module.histogram).key([]) != histogram
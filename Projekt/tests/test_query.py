@@ -0,0 +1,56 @@
+import pytest
+
+from autoscout24 import benchmark, clean, storage
+
+duckdb = pytest.importorskip("duckdb")
+pytest.importorskip("pyarrow")
+
+from autoscout24.query import QueryEngine  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def engine(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("parquet")
+    AutoDFraw = benchmark._parse(benchmark.loadCorpus())
+    AutoDFraw.to_parquet(directory / ("%s.parquet" % storage.RAW_TABLE))
+    clean.cleanAutoDF(AutoDFraw).to_parquet(directory / ("%s.parquet" % storage.CLEANED_TABLE))
+    engine = QueryEngine()
+    assert engine.registerParquetDir(str(directory)) == [storage.RAW_TABLE, storage.CLEANED_TABLE]
+    yield engine
+    engine.close()
+
+
+def test_preis_nach_cleaned_table(engine):
+    result = engine.preisNach("Kraftstoff")
+    assert {"Benzin", "Diesel", "Elektro"} <= set(result.index)
+    assert result["Anzahl"].sum() == len(engine.sql('SELECT * FROM "%s"' % storage.CLEANED_TABLE))
+    assert engine.preisNach("Marke", kraftstoff="Diesel")["Anzahl"].sum() == result.loc["Diesel", "Anzahl"]
+
+
+def test_raw_table_raises_clear_error(engine):
+    with pytest.raises(ValueError, match="Marke"):
+        engine.preisNach("Kraftstoff", table=storage.RAW_TABLE)
+    with pytest.raises(ValueError, match="Marke"):
+        engine.correlation(table=storage.RAW_TABLE)
+
+
+def test_missing_group_column_raises_clear_error(engine):
+    with pytest.raises(ValueError, match="Modell"):
+        engine.preisNach("Modell")
+    with pytest.raises(ValueError, match="nicht erlaubt"):
+        engine.preisNach("Preis; DROP TABLE x")
+
+
+def test_settings_are_validated(tmp_path):
+    with pytest.raises(ValueError, match="memoryLimit"):
+        QueryEngine(memoryLimit="1GB'; SELECT 1; --")
+    with pytest.raises(ValueError, match="threads"):
+        QueryEngine(threads="4")
+    engine = QueryEngine(memoryLimit="512MiB", tempDirectory=str(tmp_path / "spill's"), threads=2)
+    try:
+        limit, temp, threads = engine.con.execute(
+            "SELECT current_setting('memory_limit'), current_setting('temp_directory'), current_setting('threads')"
+        ).fetchone()
+        assert limit == "512.0 MiB" and temp.endswith("spill's") and threads == 2
+    finally:
+        engine.close()
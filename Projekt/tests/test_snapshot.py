@@ -0,0 +1,37 @@
+import pandas as pd
+
+from autoscout24 import benchmark, snapshot
+from autoscout24.pipeline import buildPipeline
+
+
+def test_freeze_and_load_round_trip(tmp_path):
+    AutoDFraw = benchmark._parse(benchmark.loadCorpus())
+    path = str(tmp_path / "AutoDFraw_snapshot.pkl")
+    sha256 = snapshot.freezeSnapshot(AutoDFraw, path)
+    assert sha256 == snapshot.fileHash(path)
+    pd.testing.assert_frame_equal(snapshot.loadSnapshot(path, sha256=sha256), AutoDFraw)
+
+
+def test_crawl_key_follows_snapshot_content(tmp_path, monkeypatch):
+    monkeypatch.delenv(snapshot.SNAPSHOT_ENV, raising=False)
+    AutoDFraw = benchmark._parse(benchmark.loadCorpus())
+    path = str(tmp_path / "AutoDFraw_snapshot.pkl")
+
+    def crawlKey():
+        pipe = buildPipeline(cacheDir=str(tmp_path / "cache"), verbose=False, snapshotFile=path)
+        assert pipe.tasks["crawl"].func is snapshot.loadSnapshot
+        return pipe.tasks["crawl"].key([])
+
+    snapshot.freezeSnapshot(AutoDFraw, path)
+    before = crawlKey()
+    assert crawlKey() == before
+
+    snapshot.freezeSnapshot(AutoDFraw.iloc[:-1], path)
+    assert crawlKey() != before
+
+
+def test_snapshot_path_from_environment(monkeypatch):
+    monkeypatch.setenv(snapshot.SNAPSHOT_ENV, "snap.pkl")
+    assert snapshot.snapshotPath() == "snap.pkl"
+    monkeypatch.setenv(snapshot.SNAPSHOT_ENV, "")
+    assert snapshot.snapshotPath() is None
@@ -0,0 +1,28 @@
+import pandas as pd
+import pytest
+
+from autoscout24 import benchmark, clean, crawl, synthetic
+
+
+@pytest.fixture(scope="module")
+def AutoDFraw():
+    AutoDF = clean.cleanAutoDF(benchmark._parse(benchmark.loadCorpus()))
+    sampleDF = synthetic.ListingModel(AutoDF).sample(45, seed=1)
+    return synthetic.toRawFrame(sampleDF, seed=1)
+
+
+def test_raw_frame_has_crawl_columns(AutoDFraw):
+    parsed = benchmark._parse(benchmark.loadCorpus())
+    assert list(AutoDFraw.columns) == list(parsed.columns)
+    assert AutoDFraw["ID"].is_unique
+    assert AutoDFraw["ID"].iloc[0] == "synthetic-00000000"
+    assert AutoDFraw["Link"].iloc[1] == crawl.HOST + "/angebote/synthetic-00000001"
+
+
+def test_html_pages_roundtrip_ids(AutoDFraw):
+    pages = list(synthetic.iterHTMLPages(AutoDFraw, pageSize=20))
+    assert len(pages) == 3
+    parsed = pd.concat([crawl.parsePageCarDF(page) for page in pages], ignore_index=True)
+    assert parsed["ID"].tolist() == AutoDFraw["ID"].tolist()
+    assert parsed["Link"].tolist() == AutoDFraw["Link"].tolist()
+    assert parsed["Preis"].tolist() == AutoDFraw["Preis"].tolist()
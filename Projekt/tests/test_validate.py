@@ -0,0 +1,68 @@
+import pandas as pd
+import pytest
+
+from autoscout24 import clean, validate
+
+
+def _raw(**overrides):
+    car = {
+        "ID": "audi-a4", "Link": "https://www.autoscout24.de/angebote/audi-a4", "Titel": "Audi A4\xa0",
+        "Version": "2.0 TDI", "Untertitel": "Klimaautomatik, Navigationssystem", "Preis": "€ 18.490,-",
+        "Leasing": False, "Standort": "DE-80331 München", "km": "98.500 km", "Erstzulassung": "04/2017",
+        "PS": "110 kW (150 PS)", "Zustand": "Gebraucht", "Fahrzeughalter": "2 Fahrzeughalter",
+        "Getriebe": "Automatik", "Kraftstoff": "Diesel", "Verbrauch_l_pro_100km": "4,6 l/100 km (komb.)",
+        "Emissionen_g_pro_km": "119 g/km (komb.)",
+    }
+    car.update(overrides)
+    return car
+
+
+@pytest.fixture
+def AutoDFraw():
+    return pd.DataFrame([
+        _raw(),
+        _raw(ID="tesla", Titel="Tesla Model 3\xa0", Kraftstoff="Elektro",
+             Verbrauch_l_pro_100km="- (l/100 km)", Emissionen_g_pro_km="0 g/km (komb.)"),
+        _raw(ID="golf", Kraftstoff="Benzin", Verbrauch_l_pro_100km="0 l/100 km (komb.)"),
+        _raw(ID="leasing", Preis="€ 189,- mtl.", Leasing=True),
+        _raw(ID="ohne-getriebe", Getriebe="- (Getriebe)", PS="- (PS)"),
+    ], index=[10, 11, 12, 13, 14])
+
+
+def test_rules_split_valid_and_quarantine(AutoDFraw):
+    valid, quarantine, hits = validate.validateAutoDF(clean.transformRaw(AutoDFraw), raw=AutoDFraw)
+    assert valid["ID"].tolist() == ["audi-a4", "tesla"]
+    assert quarantine.index.tolist() == [12, 13, 14]
+    assert quarantine["Gründe"].tolist() == ["Verbrauch fehlt", "Leasing; Preis unplausibel",
+                                             "PS fehlt; Getriebe fehlt"]
+    assert hits["Verbrauch fehlt"] == 1 and hits["Emissionen fehlen"] == 0
+
+
+def test_elektro_without_consumption_gets_zero(AutoDFraw):
+    valid, _, _ = validate.validateAutoDF(clean.transformRaw(AutoDFraw))
+    tesla = valid.set_index("ID").loc["tesla"]
+    assert tesla["Verbrauch_l_pro_100km"] == 0 and tesla["Emissionen_g_pro_km"] == 0
+    assert valid.set_index("ID").loc["audi-a4", "Verbrauch_l_pro_100km"] == 4.6
+
+
+def test_quarantine_keeps_raw_values(AutoDFraw):
+    AutoDF, quarantine, _ = clean.cleanPartition(AutoDFraw)
+    assert list(quarantine.columns) == list(AutoDFraw.columns) + ["Gründe"]
+    assert quarantine.loc[13, "Preis"] == "€ 189,- mtl."
+    assert quarantine.loc[12, "Verbrauch_l_pro_100km"] == "0 l/100 km (komb.)"
+    assert quarantine.loc[14, "Standort"] == "DE-80331 München"
+    assert AutoDF.index.tolist() == [10, 11]
+    assert AutoDF["Preis"].dtype.kind == "i"
+
+
+def test_custom_rules():
+    AutoDF = pd.DataFrame({"Verbrauch_l_pro_100km": ["0", "60", "5.5", None, "3"],
+                           "Kraftstoff": ["Diesel", "Diesel", "Benzin", "Elektro", "Elektro"]})
+    rules = [("Verbrauch fehlt", "Verbrauch_l_pro_100km", "nonzero", ("Kraftstoff", "Elektro")),
+             ("Verbrauch unplausibel", "Verbrauch_l_pro_100km", "between", (0, 50))]
+    valid, quarantine, hits = validate.validateAutoDF(AutoDF, rules)
+    assert valid["Verbrauch_l_pro_100km"].tolist() == [5.5, 0, 0]
+    assert quarantine["Gründe"].tolist() == ["Verbrauch fehlt", "Verbrauch unplausibel"]
+    assert hits.tolist() == [1, 1]
+    with pytest.raises(ValueError, match="unbekannte Prüfung"):
+        validate.validateAutoDF(AutoDF, [("x", "Kraftstoff", "positive", None)])
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objs as go
+
+from autoscout24 import viz
+
+
+def test_distplot_groups_share_bin_edges():
+    AutoDF = pd.DataFrame({
+        "Getriebe": ["Automatik"] * 3 + ["Schaltgetriebe"] * 3 + ["Halbautomatik"],
+        "Preis": [10500, 14000, 31000, 2200, 4100, 9000, 17000],
+    })
+    fig = viz.preisDistplotGetriebe(AutoDF, lightweight=True)
+    starts = [np.asarray(trace.x) - np.asarray(trace.width) / 2 for trace in fig.data]
+    assert len(starts) == 3
+    for start in starts:
+        np.testing.assert_allclose(start, starts[0])
+        np.testing.assert_allclose(start % 3000, 0)
+    for trace in fig.data:
+        np.testing.assert_allclose((np.asarray(trace.y) * np.asarray(trace.width)).sum(), 1)
+
+
+def test_bin_edges_cover_all_values():
+    edges = viz._binEdges([2999, 3000, 9000], binSize=3000)
+    assert edges[0] == 0 and edges[-1] >= 9000
+    centers, counts, widths = viz._histogramBars([2999, 3000, 9000], edges=edges)
+    assert counts.sum() == 3
+
+
+def test_page_budget_rasterizes_over_budget(monkeypatch):
+    monkeypatch.setattr(viz, "rasterize", lambda fig: "png")
+    fig = go.Figure(go.Bar(x=[1, 2], y=[3, 4]))
+    size = viz.figureSize(fig)
+
+    budget = viz.PageBudget(int(size * 1.5))
+    assert budget.show(fig) is fig
+    assert budget.show(fig) == "png"
+    assert budget.used == size
+
+    unlimited = viz.PageBudget(None)
+    assert all(unlimited.show(fig) is fig for _ in range(3))